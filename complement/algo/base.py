@@ -11,14 +11,19 @@ basic helper functions for generating complements with our algorithms.
 import abc
 
 from itertools import combinations, chain
-from typing import Any, List, Iterable, Set, FrozenSet, Tuple, Callable
+from typing import Any, Dict, List, Iterable, Optional, Set, FrozenSet, Tuple, Callable, Union
 
 import spot
 import buddy
 
+from .cache import LRUCache, MISSING
+from .encoding import get_encoding
+from .preprocess import preprocess
+
 BDD = Any
-States = FrozenSet[int]
-MetaStates = FrozenSet[Tuple[FrozenSet[int], FrozenSet[int]]]
+# Sets of states are frozensets or bitmasks depending on the used encoding.
+States = Union[FrozenSet[int], int]
+MetaStates = Union[FrozenSet[Tuple[States, States]], Tuple[Tuple[int, int], ...]]
 
 
 class ComplementationAlgorithm(abc.ABC):
@@ -30,25 +35,48 @@ class ComplementationAlgorithm(abc.ABC):
     switches (for example for optimizations).
 
     Attributes:
-        input_automaton (`spot.twa_graph`): Input automaton for the algorithm.
+        input_automaton (`spot.twa_graph`): Input automaton for the algorithm, reduced
+            by the level of preprocessing given by the `preprocess` argument.
         args (`dict`): Optional arguments.
+        preprocess_report (`List[dict]`): Sizes of the input automaton before and
+            after each stage of preprocessing and the time spent in it.
         sccs (`spot.scc_info`): SCC information of the input automaton.
         output_automaton (`spot.twa_graph`): Output automaton of the algorithm.
-        all_aps (`BDD`): BDD representing all possible APs used in the input automaton.
-        cache (`dict`): Dictionary for any caching required by the algorithm.
+        alphabet (`List[BDD]`): Classes of the coarsest partition of the alphabet
+            induced by the edge labels of the input automaton.
+        transitions (`dict`): Successors of each state for each class of `alphabet`.
+        hopeful_states (`FrozenSet[int]`): States from which a rejecting cycle can be
+            reached in their SCC.
+        hopeful (`States`): `hopeful_states` encoded by `encoding`.
+        cache (`Dict[str, LRUCache]`): Caches used by the algorithm by their names,
+            see `CACHES`. Their size limits are given by the `cache` argument mapping
+            names of the caches to their maximal sizes (`None` for unbounded and `0`
+            for disabled caches). Successors are cached per single state or
+            metastate and letter, and whether they are restricted by a state
+            filter, so an algorithm has to use a single state filter.
+        encoding: Encoding of sets of states and metastates, see `encoding`.
 
     """
 
+    # Names of the caches used by the algorithm.
+    CACHES = ('successor_state', 'successor_S')
+
+    # Whether the algorithm explores the complement itself, otherwise `alphabet`,
+    # `transitions` and the hopeful states are not computed.
+    EXPLORES = True
+
     @abc.abstractmethod
     def __init__(self, input_automaton: spot.twa_graph, args: dict = {}):
         # Check whether the input is a Buchi automaton.
         if not input_automaton.acc().is_buchi():
             raise ValueError('Input automaton must be Buchi')
 
-        self.input_automaton = input_automaton#spot.scc_filter_states(input_automaton, True)
         self.args = {}
         self.args.update(args)
 
+        # Reduce the input automaton first, see `preprocess`.
+        self.input_automaton, self.preprocess_report = preprocess(input_automaton, self.args.get('preprocess', 'none'))
+
         # Get SCCs of the input automaton.
         self.sccs = spot.scc_info(self.input_automaton)
         self.sccs.determine_unknown_acceptance()
@@ -63,56 +91,108 @@ class ComplementationAlgorithm(abc.ABC):
         # Set basic Buchi acceptance.
         self.output_automaton.set_acceptance(1, "Inf(0)")
 
-        # Prepare helper for minterms (all APs).
-        self.all_aps = buddy.bddtrue
-        # All possible minterms.
-        conds = set()
-        for edge in self.input_automaton.edges():
-            conds.add(edge.cond)
-        for cond in conds:
-            self.all_aps &= buddy.bdd_support(cond)
+        cache_sizes = self.args.get('cache', dict())
+        self.cache = {name: LRUCache(name, cache_sizes.get(name)) for name in self.CACHES}
 
-        self.cache = {}
+        # Sets of states are encoded either as frozensets or as bitmasks.
+        self.encoding = get_encoding(self.args.get('encoding', 'sets'))
 
-    @abc.abstractmethod
-    def complement(self):
-        """Run the complementation algorithm.
+        if self.EXPLORES:
+            self._index_input()
 
-        The main method which runs the complementation.
+    def _index_input(self):
+        """Compute the alphabet, the transition table and the hopeful states."""
+        # Labels are kept in the order of the edges, so that the order of the
+        # alphabet does not depend on hashes of BDDs.
+        conds = list(dict.fromkeys(edge.cond for edge in self.input_automaton.edges()))
 
-        """
-        pass
+        # Letters which no edge label can tell apart are explored together.
+        self.alphabet = self.partition_alphabet(conds)
+
+        self.transitions = self._build_transitions()
 
-    def get_minterms(self, label: BDD) -> List[BDD]:
-        """Get minterms for a given label.
+        # Hopeful states as a set and encoded by `encoding` for quick filtering.
+        self.hopeful_states = self._compute_hopeful_states()
+        self.hopeful = self.encoding.make(self.hopeful_states)
 
-        Get all the minterms that are represented by a given BDD label.
+    @staticmethod
+    def partition_alphabet(labels: Iterable[BDD]) -> List[BDD]:
+        """Get the coarsest partition of the alphabet induced by the given labels.
+
+        Two letters fall into the same class if and only if every label either
+        contains both of them or none of them. Each class is thus either fully
+        contained in a label or disjoint with it.
 
         Args:
-            label (`BDD`): Label (such as `a & !b`) represented as a BDD var.
+            labels (`Iterable[BDD]`): Labels (such as `a & !b`) represented as BDD vars.
 
         Returns:
-            `List[BDD]`: List of all possible minterms (represented as BDD vars)
-                for the given label.
+            `List[BDD]`: Classes of the partition represented as BDD vars.
 
         """
-        cached = self.cache.setdefault('minterms', dict())
+        classes = [buddy.bddtrue]
 
-        if label in cached:
-            return cached[label]
+        for label in labels:
+            refined = []
+            for letters in classes:
+                for part in (letters & label, letters - label):
+                    if part != buddy.bddfalse:
+                        refined.append(part)
+            classes = refined
 
-        minterms = []
+        return classes
 
-        all_ = label
+    def _build_transitions(self) -> Dict[int, Dict[BDD, Tuple[States, States]]]:
+        """Index the transitions of the input automaton by state and letter.
 
-        while all_ != buddy.bddfalse:
-            one = buddy.bdd_satoneset(all_, self.all_aps, buddy.bddfalse)
-            all_ = all_ - one
-            minterms.append(one)
+        Every edge is split into the classes of `alphabet` contained in its label,
+        so that the successors of a state for a given letter can later be looked up
+        directly instead of testing the letter against the labels of all the
+        outgoing edges.
 
-        cached[label] = minterms
+        Returns:
+            `Dict[int, Dict[BDD, Tuple[States, States]]]`: Map from a state and a letter
+                to the pair of all its successors and of its successors reached by
+                an accepting edge, both encoded by `encoding`.
 
-        return minterms
+        """
+        table = {s: dict() for s in range(self.input_automaton.num_states())}
+
+        for edge in self.input_automaton.edges():
+            for letter in self.alphabet:
+                if letter & edge.cond == buddy.bddfalse:
+                    continue
+
+                successors, marked = table[edge.src].setdefault(letter, (set(), set()))
+
+                successors.add(edge.dst)
+
+                if edge.acc:
+                    marked.add(edge.dst)
+
+        return {
+            s: {letter: (self.encoding.make(successors), self.encoding.make(marked))
+                for letter, (successors, marked) in letters.items()}
+            for s, letters in table.items()
+        }
+
+    def cache_stats(self) -> Dict[str, Dict[str, Optional[int]]]:
+        """Get hits, misses, evictions and sizes of all the caches.
+
+        Returns:
+            `Dict[str, Dict[str, Optional[int]]]`: Statistics of the caches by their names.
+
+        """
+        return {name: cache.stats() for name, cache in self.cache.items()}
+
+    @abc.abstractmethod
+    def complement(self):
+        """Run the complementation algorithm.
+
+        The main method which runs the complementation.
+
+        """
+        pass
 
     @staticmethod
     def powerset(iterable: Iterable[Any]) -> Iterable[Iterable[Any]]:
@@ -140,13 +220,8 @@ class ComplementationAlgorithm(abc.ABC):
         """Check if state `s` is hopeful.
 
         Checks if the state `s` is hopeful - that is a rejecting cycle is reachable from
-        `s` in the SCC of this state.
-
-        The check constructs a new temporary automaton, starting from state `s`. It
-        adds the successors one by one, ignoring any accepting edges. Once the whole
-        SCC is filled this way (all other successors lie in a different SCC),
-        it tries if the automaton contains anything. If it does not, there is
-        no rejecting cycle reachable from `s`.
+        `s` in the SCC of this state. The hopeful states are computed for the whole
+        automaton when the algorithm is constructed, see `_compute_hopeful_states`.
 
         Args:
             s (int): State of the input automaton given by a number.
@@ -154,182 +229,145 @@ class ComplementationAlgorithm(abc.ABC):
         Returns:
             `bool`: State `s` is hopeful or not.
         """
-        cached = self.cache.setdefault('hopeful_states', dict())
-
-        if s in cached:
-            return cached[s]
+        return s in self.hopeful_states
 
-        if not spot.scc_has_rejecting_cycle(self.sccs, self.sccs.scc_of(s)):
-            cached[s] = False
-            return False
-
-        # Create a temporary automaton.
-        bdict = spot.make_bdd_dict()
-        temp = spot.make_twa_graph(bdict)
+    def _compute_hopeful_states(self) -> FrozenSet[int]:
+        """Compute all the hopeful states of the input automaton.
 
-        temp.copy_ap_of(self.input_automaton)
-        temp.set_acceptance(0, "all")
+        For each SCC, the sub-graph of its non-accepting edges is decomposed into
+        SCCs. States of the non-trivial ones lie on a rejecting cycle. The reachability
+        of those states is then propagated backwards in the sub-graph, so that the whole
+        computation is linear in the size of the input automaton.
 
-        state_map = dict()
+        Returns:
+            `FrozenSet[int]`: Set of all the hopeful states.
 
-        state_map[s] = temp.new_state()
-        to_check = [s]
+        """
+        hopeful = set()
 
-        while to_check:
-            state = to_check.pop(0)
+        for scc in range(self.sccs.scc_count()):
+            states = list(self.sccs.states_of(scc))
 
-            for edge in self.input_automaton.out(state):
-                # Follow a single SCC.
-                if self.sccs.scc_of(edge.src) != self.sccs.scc_of(edge.dst):
-                    continue
+            # Non-accepting edges inside the SCC and their reverse.
+            graph = {s: set() for s in states}
+            reverse = {s: set() for s in states}
+            for s in states:
+                for edge in self.input_automaton.out(s):
+                    if edge.acc or self.sccs.scc_of(edge.dst) != scc:
+                        continue
 
-                if not edge.acc:
-                    if edge.dst not in state_map:
-                        to_check.append(edge.dst)
-                        state_map[edge.dst] = temp.new_state()
+                    graph[s].add(edge.dst)
+                    reverse[edge.dst].add(s)
 
-                    temp.new_edge(state_map[state], state_map[edge.dst], buddy.bddtrue)
+            to_check = list(self._cyclic_states(graph))
+            found = set(to_check)
+            while to_check:
+                state = to_check.pop()
 
-        hopeful = spot.contains(temp, 'true')
+                for predecessor in reverse[state]:
+                    if predecessor not in found:
+                        found.add(predecessor)
+                        to_check.append(predecessor)
 
-        cached[s] = hopeful
-        return hopeful
+            hopeful.update(found)
 
-    def successors(
-            self,
-            states: States,
-            minterm: BDD,
-            state_filter: Callable[[Tuple[int, int]], bool] = lambda s: True
-    ) -> Tuple[States, States, Set[States]]:
-        """Get successors of the given list of states for given label.
+        return frozenset(hopeful)
 
-        This calculates the powerset for a given set of states and a minterm, ie. all
-        the successors of the states in `states` for `minterm`.
+    @staticmethod
+    def _cyclic_states(graph: Dict[int, Set[int]]) -> Set[int]:
+        """Get states of a graph which lie on a cycle.
 
-        Also checks which of those we got to by passing an accepting edge or by a
-        nondeterministic transition.
+        Uses an iterative version of Tarjan's algorithm to find the SCCs of the graph,
+        a state lies on a cycle if its SCC has more than one state or a self-loop.
 
         Args:
-            states (`Frozenset[int]`): Set of states.
-            minterm (`BDD`): A minterm to calculate successors for.
-            state_filter (`Callable[[Tuple[int, int]], bool]`, optional): Filter for
-                successor states (for possible optimizations).
+            graph (`Dict[int, Set[int]]`): Map from states to their successors.
 
         Returns:
-            `Tuple[FrozenSet[int], Set[int], Set[FrozenSet[int]]]`: A triple containing
-                the set of all successors, a set of all successors by passing an accepting
-                transition and a set of sets of the different nondeterministic successors.
+            `Set[int]`: States lying on a cycle of the graph.
 
         """
-        cached_sets = self.cache.setdefault('successor_set', dict())
-        cached_states = self.cache.setdefault('successor_state', dict())
-
-        if (minterm, states, state_filter) in cached_sets:
-            return cached_sets[(minterm, states, state_filter)]
-
-        successors = {}
-        marked = {}
-        for s in states:
-            if (minterm, s, state_filter) in cached_states:
-                successors.update(cached_states[(minterm, s, state_filter)][0])
-                marked.update(cached_states[(minterm, s, state_filter)][1])
+        index = {}
+        low = {}
+        stack = []
+        on_stack = set()
+        cyclic = set()
+
+        for root in graph:
+            if root in index:
                 continue
 
-            for edge in self.input_automaton.out(s):
-                # Skip this edge if it does not contain the minterm currently handled.
-                if minterm not in self.get_minterms(edge.cond):
-                    continue
-
-                # Check if state passes the state filter for any possible optimizations.
-                if not state_filter((edge.src, edge.dst)):
-                    continue
-
-                successors.setdefault(s, set()).add(edge.dst)
-
-                if edge.acc:
-                    marked.setdefault(s, set()).add(edge.dst)
-
-            cached_states[(minterm, s, state_filter)] = (
-                {s: successors.get(s, set())},
-                {s: marked.get(s, set())}
-            )
-
-        # Flatten all the different successors and marked successors into a single set.
-        all_successors = {s for succs in successors.values() for s in succs}
-        all_marked = {s for succs in marked.values() for s in succs}
-
-        # Get nondeterministic successors of different states.
-        # This seems complicated but it basically creates a set of all the
-        # sets of states we got to by a nondeterministic transition for each state.
-        nondeterministic = {frozenset(v) for _, v in successors.items() if len(v) > 1}
-
-        cached_sets[(minterm, states, state_filter)] = (
-            frozenset(all_successors),
-            frozenset(all_marked),
-            nondeterministic
-        )
-
-        return frozenset(all_successors), frozenset(all_marked), nondeterministic
-
-    def successors_metastates(
+            index[root] = low[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(graph[root]))]
+
+            while work:
+                state, successors = work[-1]
+
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = low[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append((successor, iter(graph[successor])))
+                        break
+                    elif successor in on_stack:
+                        low[state] = min(low[state], index[successor])
+                else:
+                    # All successors explored, go back.
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[state])
+
+                    if low[state] == index[state]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == state:
+                                break
+
+                        if len(component) > 1 or state in graph[state]:
+                            cyclic.update(component)
+
+        return cyclic
+
+    def _state_successors(
             self,
-            states: MetaStates,
+            s: int,
             minterm: BDD,
-            state_filter: Callable[[Tuple[int, int]], bool] = lambda s: True,
-            metastate_filter: Callable[[MetaStates], bool] = lambda s: True
-    ) -> Tuple[MetaStates, bool]:
-        """Get successors of metastates in S.
-
-        Also check whether the resulting set of metastates is valid, ie.
-        there is no metastate in the form (A, A).
+            state_filter: Optional[Callable[[Tuple[int, int]], bool]] = None
+    ) -> Tuple[States, States]:
+        """Get successors of a single state for given minterm.
 
         Args:
-            states (`FrozenSet[Tuple[FrozenSet[int], FrozenSet[int]]]`): Set of metastates.
-            minterm (`BDD`): A minterm to calculate successors for.
+            s (int): State of the input automaton given by a number.
+            minterm (`BDD`): A letter from `alphabet` to calculate successors for.
             state_filter (`Callable[[Tuple[int, int]], bool]`, optional): Filter for
                 successor states (for possible optimizations).
-            metastate_filter (`Callable[[MetaStates], bool]`, optional): Filter on all
-                the metastate successors. Can be used for optimizations.
 
         Returns:
-            `Tuple[FrozenSet[Tuple[FrozenSet[int], FrozenSet[int]]], bool]`: A pair
-                with the first element being the resulting set of metastates and
-                the second element being a boolean of validness of the given result.
+            `Tuple[States, States]`: A pair of all the successors of `s` and of those
+                reached by an accepting edge.
 
         """
-        cached = self.cache.setdefault('successor_S', dict())
+        empty = self.encoding.empty
+        successors, marked = self.transitions[s].get(minterm, (empty, empty))
 
-        if (minterm, states, state_filter) in cached:
-            return cached[(minterm, states, state_filter)]
+        if state_filter is None:
+            return successors, marked
 
-        successors = set()
-        valid = True
-        for s in states:
-            # Since S states are pair of set of states, we need to split those,
-            # calculate their successors, then put this back together.
-            powerset = s[0]
-            breakpoint = s[1]
+        cached_states = self.cache['successor_state']
 
-            successor_powerset, marked, _ = self.successors(powerset, minterm, state_filter)
-            successor_breakpoint, ignored, _ = self.successors(breakpoint, minterm, state_filter)
-
-            successor_breakpoint = successor_breakpoint.union(marked)
-
-            # Cut off preemptively to avoid accepting in the input automaton.
-            if successor_powerset == successor_breakpoint:
-                valid = False
-
-            new = (successor_powerset, successor_breakpoint)
-
-            if new not in successors:
-                successors.add(new)
-
-        successors = frozenset(successors)
-
-        if not metastate_filter(successors):
-            valid = False
-
-        cached[(minterm, states, state_filter)] = (successors, valid)
-
-        return successors, valid
+        result = cached_states.get((minterm, s))
+        if result is MISSING:
+            result = (
+                self.encoding.make(filter(lambda d: state_filter((s, d)), self.encoding.members(successors))),
+                self.encoding.make(filter(lambda d: state_filter((s, d)), self.encoding.members(marked)))
+            )
+            cached_states[(minterm, s)] = result
 
+        return result
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Bounded caches for complementation algorithms.
+
+This module provides a least recently used cache with an optional size limit
+which counts its hits, misses and evictions, so that the caching done by the
+algorithms can be tuned and reported.
+
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Returned by `LRUCache.get` when the key is not cached.
+MISSING = object()
+
+
+class LRUCache:
+    """Cache evicting the least recently used entries.
+
+    Attributes:
+        name (str): Name of the cache used in reports.
+        maxsize (`Optional[int]`): Maximal number of entries, `None` for an
+            unbounded cache and `0` for a disabled one.
+        hits (int): Number of successful lookups.
+        misses (int): Number of failed lookups.
+        evictions (int): Number of entries evicted to respect `maxsize`.
+
+    """
+
+    def __init__(self, name: str, maxsize: Optional[int] = None):
+        if maxsize is not None and maxsize < 0:
+            raise ValueError(f'Size of cache {name} must not be negative')
+
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Look up a cached value.
+
+        Args:
+            key (`Hashable`): Key of the value.
+
+        Returns:
+            The cached value or `MISSING` if `key` is not cached.
+
+        """
+        value = self._entries.get(key, MISSING)
+
+        if value is MISSING:
+            self.misses += 1
+        else:
+            self.hits += 1
+            if self.maxsize is not None:
+                self._entries.move_to_end(key)
+
+        return value
+
+    def __setitem__(self, key: Hashable, value: Any):
+        if self.maxsize == 0:
+            return
+
+        self._entries[key] = value
+
+        if self.maxsize is not None and len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop all the entries, the counters are kept."""
+        self._entries.clear()
+
+    def entries(self) -> Dict[Hashable, Any]:
+        """Get all the entries without marking them as used, for measuring the cache."""
+        return self._entries
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        """Get the counters of the cache.
+
+        Returns:
+            `Dict[str, Optional[int]]`: Hits, misses, evictions, current size
+                and the size limit of the cache.
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
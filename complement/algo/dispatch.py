@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Choice of the cheapest complementation construction for an input automaton.
+
+Full PBS is only needed for automata without a special structure, the others
+have much cheaper complementations:
+
+- deterministic automata are complemented by dualization,
+- automata recognizing obligation languages are minimized to a deterministic
+  weak automaton, which is then dualized,
+- semi-deterministic automata are complemented by the NCSB construction of Spot.
+
+Inherently weak automata may recognize languages that are not obligations, such
+as FG b, and have no equivalent weak deterministic automaton then. The WDBA is
+therefore obtained by `spot.minimize_obligation`, which checks that it is
+equivalent to the input, and inputs without one go to the other constructions.
+
+The results of the dualizations are converted back to Buchi automata. The whole
+automaton is complemented by a single construction, constructions are not mixed
+per SCC.
+
+"""
+
+from typing import Optional, Tuple
+
+import spot
+
+# Constructions in the order in which they are tried.
+CONSTRUCTIONS = ('dualize', 'wdba', 'semidet', 'pbs')
+
+# Descriptions of the constructions reported in the output.
+DESCRIPTIONS = {
+    'dualize': 'deterministic input, dualization',
+    'wdba': 'obligation input, WDBA minimization and dualization',
+    'semidet': 'semi-deterministic input, NCSB',
+    'pbs': 'general input, PBS'
+}
+
+
+def choose_construction(aut: spot.twa_graph) -> Tuple[str, spot.twa_graph]:
+    """Choose the cheapest construction complementing an automaton.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `Tuple[str, spot.twa_graph]`: Name of the construction, see `CONSTRUCTIONS`,
+            and the automaton to pass to `complement`, which is the minimized WDBA
+            for `wdba`, so that it is not minimized again, and `aut` otherwise.
+
+    """
+    if spot.is_deterministic(aut):
+        return 'dualize', aut
+    if spot.is_inherently_weak_automaton(aut):
+        wdba = _minimize_obligation(aut)
+        if wdba is not None:
+            return 'wdba', wdba
+    if spot.is_semi_deterministic(aut):
+        return 'semidet', aut
+
+    return 'pbs', aut
+
+
+def complement(aut: spot.twa_graph, construction: str) -> spot.twa_graph:
+    """Complement an automaton by a construction other than PBS.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton given by `choose_construction`
+            for the construction.
+        construction (str): Name of the construction, see `CONSTRUCTIONS`.
+
+    Returns:
+        `spot.twa_graph`: Buchi automaton recognizing the complement.
+
+    """
+    # The WDBA is deterministic, it is dualized too.
+    if construction in ('dualize', 'wdba'):
+        return _to_buchi(spot.dualize(aut))
+    if construction == 'semidet':
+        return spot.complement_semidet(aut)
+
+    raise ValueError(f'Unknown construction: {construction}')
+
+
+def annotate(hoa: str, construction: str, description: Optional[str] = None) -> str:
+    """Record the used construction as a comment in the header of an automaton.
+
+    Args:
+        hoa (str): Automaton in HOA.
+        construction (str): Name of the construction, see `CONSTRUCTIONS`.
+        description (`Optional[str]`): Description of the construction, the one
+            from `DESCRIPTIONS` by default.
+
+    Returns:
+        str: The automaton with a comment after the first line of its header.
+
+    """
+    first, _, rest = hoa.partition('\n')
+
+    return f'{first}\n{comment(construction, description)}\n{rest}'
+
+
+def comment(construction: str, description: Optional[str] = None) -> str:
+    """Get the HOA comment recording the used construction, see `annotate`.
+
+    Args:
+        construction (str): Name of the construction, see `CONSTRUCTIONS`.
+        description (`Optional[str]`): Description of the construction, the one
+            from `DESCRIPTIONS` by default.
+
+    Returns:
+        str: The comment.
+
+    """
+    if description is None:
+        description = DESCRIPTIONS[construction]
+
+    return f'/* construction: {construction} ({description}) */'
+
+
+def _to_buchi(aut: spot.twa_graph) -> spot.twa_graph:
+    # Cheap conversion, the dual is already small.
+    return spot.postprocess(aut, 'Buchi', 'Low')
+
+
+def _minimize_obligation(aut: spot.twa_graph) -> Optional[spot.twa_graph]:
+    # Spot returns the input itself if the minimized WDBA is not equivalent to it.
+    wdba = spot.minimize_obligation(aut)
+    if not spot.is_deterministic(wdba):
+        return None
+
+    return wdba
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""Encodings of sets of states used in macrostates.
+
+This module provides the representations the complementation algorithms can use
+for sets of input states and for sets of metastates. The default one uses frozensets,
+the compact one encodes sets of states as integer bitmasks over the numbers of the
+input states and sets of metastates as sorted tuples of pairs of bitmasks.
+
+Both representations support `|` and `&` for union and intersection and are falsy
+when empty, any other operation goes through the encoding.
+
+"""
+
+from typing import Any, FrozenSet, Iterable, Iterator, Tuple
+
+
+class SetEncoding:
+    """Sets of states as frozensets.
+
+    Attributes:
+        empty (`FrozenSet[int]`): The empty set of states.
+
+    """
+
+    empty = frozenset()
+
+    @staticmethod
+    def make(states: Iterable[int]) -> FrozenSet[int]:
+        """Encode states given by their numbers as a set of states."""
+        return frozenset(states)
+
+    @staticmethod
+    def single(state: int) -> FrozenSet[int]:
+        """Encode a single state as a set of states."""
+        return frozenset([state])
+
+    @staticmethod
+    def members(states: FrozenSet[int]) -> Iterable[int]:
+        """Get the numbers of states in a set of states."""
+        return states
+
+    @staticmethod
+    def size(states: FrozenSet[int]) -> int:
+        """Get the number of states in a set of states."""
+        return len(states)
+
+    @staticmethod
+    def union(sets: Iterable[FrozenSet[int]]) -> FrozenSet[int]:
+        """Get the union of sets of states."""
+        return frozenset().union(*sets)
+
+    @staticmethod
+    def issubset(states: FrozenSet[int], other: FrozenSet[int]) -> bool:
+        """Check whether all states of `states` are in `other`."""
+        return states <= other
+
+    @staticmethod
+    def difference(states: FrozenSet[int], other: FrozenSet[int]) -> FrozenSet[int]:
+        """Get states of `states` which are not in `other`."""
+        return states.difference(other)
+
+    @staticmethod
+    def metastates(
+            metastates: Iterable[Tuple[FrozenSet[int], FrozenSet[int]]]
+    ) -> FrozenSet[Tuple[FrozenSet[int], FrozenSet[int]]]:
+        """Encode metastates given as pairs of sets of states as a set of metastates."""
+        return frozenset(metastates)
+
+
+class BitsetEncoding:
+    """Sets of states as integer bitmasks.
+
+    State `s` is in the set if and only if the bit `1 << s` is set. Sets of
+    metastates are sorted tuples of pairs of bitmasks without duplicates.
+
+    Attributes:
+        empty (`int`): The empty set of states.
+
+    """
+
+    empty = 0
+
+    @staticmethod
+    def make(states: Iterable[int]) -> int:
+        """Encode states given by their numbers as a set of states."""
+        bits = 0
+        for s in states:
+            bits |= 1 << s
+
+        return bits
+
+    @staticmethod
+    def single(state: int) -> int:
+        """Encode a single state as a set of states."""
+        return 1 << state
+
+    @staticmethod
+    def members(states: int) -> Iterator[int]:
+        """Get the numbers of states in a set of states."""
+        while states:
+            lowest = states & -states
+            yield lowest.bit_length() - 1
+            states ^= lowest
+
+    @staticmethod
+    def size(states: int) -> int:
+        """Get the number of states in a set of states."""
+        return bin(states).count('1')
+
+    @staticmethod
+    def union(sets: Iterable[int]) -> int:
+        """Get the union of sets of states."""
+        bits = 0
+        for states in sets:
+            bits |= states
+
+        return bits
+
+    @staticmethod
+    def issubset(states: int, other: int) -> bool:
+        """Check whether all states of `states` are in `other`."""
+        return not states & ~other
+
+    @staticmethod
+    def difference(states: int, other: int) -> int:
+        """Get states of `states` which are not in `other`."""
+        return states & ~other
+
+    @staticmethod
+    def metastates(metastates: Iterable[Tuple[int, int]]) -> Tuple[Tuple[int, int], ...]:
+        """Encode metastates given as pairs of sets of states as a set of metastates."""
+        return tuple(sorted(set(metastates)))
+
+
+ENCODINGS = {
+    'sets': SetEncoding,
+    'bitsets': BitsetEncoding
+}
+
+
+def get_encoding(name: str) -> Any:
+    """Get an encoding by its name.
+
+    Args:
+        name (str): Name of the encoding, either `sets` or `bitsets`.
+
+    Returns:
+        The encoding class.
+
+    """
+    if name not in ENCODINGS:
+        raise ValueError(f'Unknown encoding of states: {name}')
+
+    return ENCODINGS[name]
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""Streaming output of automata in HOA.
+
+This module writes complements in the HOA format state by state while they are
+being explored, instead of building a whole `spot.twa_graph` first. The body is
+kept in a temporary file until the number of states is known, then the header
+is written and the body is copied after it.
+
+"""
+
+import shutil
+import tempfile
+from typing import Iterable, Optional, TextIO, Tuple
+
+import spot
+import buddy
+
+from .base import BDD
+
+
+class HOAWriter:
+    """Writer of a transition-based Buchi automaton in HOA.
+
+    Labels are BDDs over the atomic propositions of the input automaton of the
+    complementation, they are written as Boolean expressions over the indices
+    of those propositions.
+
+    Attributes:
+        stream (`TextIO`): Stream the automaton is written to.
+        aps (`List[str]`): Names of the atomic propositions.
+        comment (`Optional[str]`): Comment written after the first line of the header.
+
+    """
+
+    def __init__(self, stream: TextIO, input_automaton: spot.twa_graph, name: Optional[str] = None,
+                 comment: Optional[str] = None):
+        self.stream = stream
+        self.name = name
+        self.comment = comment
+
+        bdict = input_automaton.get_dict()
+        self.aps = [ap.ap_name() for ap in input_automaton.ap()]
+        self._ap_index = {bdict.varnum(ap): i for i, ap in enumerate(input_automaton.ap())}
+
+        self._body = tempfile.TemporaryFile('w+')
+        self._labels = dict()
+
+    def state(self, number: int, edges: Iterable[Tuple[int, BDD, bool]], name: Optional[str] = None):
+        """Write a state with all its outgoing edges.
+
+        Args:
+            number (int): Number of the state.
+            edges (`Iterable[Tuple[int, BDD, bool]]`): Destinations, labels and
+                acceptance of the edges.
+            name (`Optional[str]`): Name of the state.
+        """
+        if name is None:
+            print(f'State: {number}', file=self._body)
+        else:
+            print(f'State: {number} {self._quote(name)}', file=self._body)
+
+        for dst, label, accepting in edges:
+            acc = ' {0}' if accepting else ''
+            print(f'[{self.format_label(label)}] {dst}{acc}', file=self._body)
+
+    def close(self, num_states: int, initial: int = 0):
+        """Write the header followed by the body written so far.
+
+        Args:
+            num_states (int): Number of written states.
+            initial (int): Number of the initial state.
+        """
+        header = ['HOA: v1']
+        if self.comment is not None:
+            header.append(self.comment)
+        if self.name is not None:
+            header.append(f'name: {self._quote(self.name)}')
+        header += [
+            f'States: {num_states}',
+            f'Start: {initial}',
+            ' '.join([f'AP: {len(self.aps)}'] + [self._quote(ap) for ap in self.aps]),
+            'acc-name: Buchi',
+            'Acceptance: 1 Inf(0)',
+            'properties: trans-labels explicit-labels trans-acc',
+            '--BODY--'
+        ]
+        print('\n'.join(header), file=self.stream)
+
+        self._body.seek(0)
+        shutil.copyfileobj(self._body, self.stream)
+        self._body.close()
+
+        print('--END--', file=self.stream)
+
+    def format_label(self, label: BDD) -> str:
+        """Format a label as a HOA Boolean expression.
+
+        The label is written as a disjunction of disjoint cubes.
+
+        Args:
+            label (`BDD`): Label represented as a BDD var.
+
+        Returns:
+            str: The label in HOA.
+        """
+        if label in self._labels:
+            return self._labels[label]
+
+        cubes = []
+        rest = label
+        while rest != buddy.bddfalse:
+            cube = buddy.bdd_satone(rest)
+            rest = rest - cube
+
+            literals = []
+            while cube != buddy.bddtrue:
+                index = self._ap_index[buddy.bdd_var(cube)]
+                if buddy.bdd_low(cube) == buddy.bddfalse:
+                    literals.append(str(index))
+                    cube = buddy.bdd_high(cube)
+                else:
+                    literals.append(f'!{index}')
+                    cube = buddy.bdd_low(cube)
+
+            cubes.append('&'.join(literals) if literals else 't')
+
+        formatted = ' | '.join(cubes) if cubes else 'f'
+        self._labels[label] = formatted
+
+        return formatted
+
+    @staticmethod
+    def _quote(string: str) -> str:
+        escaped = string.replace('\\', '\\\\').replace('"', '\\"')
+        return f'"{escaped}"'
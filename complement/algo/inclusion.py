@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""Language inclusion checking by PBS.
+
+This module checks whether the language of an automaton A is included in the
+language of a Buchi automaton B. Instead of building the whole complement of B
+and then the product with A, it explores the product of A with the complement
+of B on the fly and stops at the first accepting lasso, which gives a word
+accepted by A and not by B.
+
+"""
+
+from collections import deque
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import spot
+import buddy
+
+from .base import BDD
+from .pbs import PBS, Macrostate
+
+# A state of the product given by a state of A and a macrostate of the complement of B.
+ProductState = Tuple[int, Macrostate]
+# An edge of the product given by its label, destination and acceptance marks.
+ProductEdge = Tuple[BDD, ProductState, int]
+
+# Marks of accepting edges of A and of the complement of B.
+LEFT_MARK = 1
+RIGHT_MARK = 2
+BOTH_MARKS = LEFT_MARK | RIGHT_MARK
+
+
+class InclusionChecker:
+    """Checker of the inclusion of L(A) in L(B).
+
+    Both automata have to share their BDD dictionary, as for any product in Spot.
+
+    Attributes:
+        left (`spot.twa_graph`): Buchi automaton A.
+        complement (`PBS`): PBS complementation of automaton B, explored lazily.
+
+    """
+
+    def __init__(self, left: spot.twa_graph, right: spot.twa_graph, args: dict = {}):
+        if not left.acc().is_buchi():
+            raise ValueError('Included automaton must be Buchi')
+
+        self.left = left
+        self.complement = PBS(right, args)
+
+        self._macrostate_edges = dict()
+        self._edges = dict()
+
+    def is_included(self) -> bool:
+        """Check whether L(A) is included in L(B).
+
+        Returns:
+            bool: `True` if every word accepted by A is accepted by B.
+
+        """
+        return self.counterexample() is None
+
+    def counterexample(self) -> Optional[spot.twa_word]:
+        """Find a word accepted by A and not by B.
+
+        Runs Couvreur's emptiness check on the product of A with the complement
+        of B, with both automata explored only as far as the check needs.
+
+        Returns:
+            `Optional[spot.twa_word]`: A word in the form of a lasso, or `None` if
+                the language of A is included in the language of B.
+
+        """
+        initial = (self.left.get_init_state_number(), self.complement.initial_macrostate())
+
+        # Numbers of visited states in the order of visiting, 0 for states of
+        # already finished SCCs.
+        order = dict()
+        parents = dict()
+        # Stack of roots of the SCCs on the search path with marks seen inside them.
+        roots = []
+        # Marks of the edges leading to the roots.
+        arcs = []
+        # States of the SCCs on the search path.
+        live = []
+        todo = []
+
+        def push(state: ProductState, marks: int):
+            order[state] = len(order) + 1
+            roots.append([order[state], 0])
+            arcs.append(marks)
+            live.append(state)
+            todo.append((state, iter(self._product_edges(state))))
+
+        push(initial, 0)
+
+        while todo:
+            state, edges = todo[-1]
+
+            for label, successor, marks in edges:
+                if successor not in order:
+                    parents[successor] = (state, label)
+                    push(successor, marks)
+                    break
+
+                if not order[successor]:
+                    continue
+
+                # Merge all the SCCs on the cycle closed by this edge.
+                while roots[-1][0] > order[successor]:
+                    _, root_marks = roots.pop()
+                    marks |= root_marks | arcs.pop()
+                roots[-1][1] |= marks
+
+                if roots[-1][1] == BOTH_MARKS:
+                    return self._lasso(initial, parents, order, live, roots[-1][0])
+            else:
+                todo.pop()
+
+                if roots[-1][0] == order[state]:
+                    # The SCC of this state is finished.
+                    roots.pop()
+                    arcs.pop()
+                    while True:
+                        finished = live.pop()
+                        order[finished] = 0
+                        if finished == state:
+                            break
+
+        return None
+
+    def _product_edges(self, state: ProductState) -> List[ProductEdge]:
+        """Get edges of the product leaving a state.
+
+        Args:
+            state (`ProductState`): State of the product.
+
+        Returns:
+            `List[ProductEdge]`: Labels, destinations and acceptance marks of the edges.
+
+        """
+        if state in self._edges:
+            return self._edges[state]
+
+        q, macrostate = state
+
+        if macrostate not in self._macrostate_edges:
+            self._macrostate_edges[macrostate] = list(set(self.complement.macrostate_successors(macrostate)))
+
+        edges = []
+        for edge in self.left.out(q):
+            for letter, successor, accepting in self._macrostate_edges[macrostate]:
+                label = edge.cond & letter
+                if label == buddy.bddfalse:
+                    continue
+
+                marks = (LEFT_MARK if edge.acc else 0) | (RIGHT_MARK if accepting else 0)
+                edges.append((label, (edge.dst, successor), marks))
+
+        self._edges[state] = edges
+
+        return edges
+
+    def _lasso(
+            self,
+            initial: ProductState,
+            parents: Dict[ProductState, Tuple[ProductState, BDD]],
+            order: Dict[ProductState, int],
+            live: List[ProductState],
+            root: int
+    ) -> spot.twa_word:
+        """Build an accepting lasso of the product.
+
+        Args:
+            initial (`ProductState`): Initial state of the product.
+            parents (`Dict[ProductState, Tuple[ProductState, BDD]]`): Map from visited
+                states to the state and label they were first reached by.
+            order (`Dict[ProductState, int]`): Numbers of visited states.
+            live (`List[ProductState]`): States of the SCCs on the search path.
+            root (int): Number of the root of the accepting SCC.
+
+        Returns:
+            `spot.twa_word`: Labels of the path to the SCC and of a cycle in it
+                visiting both accepting marks.
+
+        """
+        scc = {state for state in live if order[state] >= root}
+        start = next(state for state in live if order[state] == root)
+
+        prefix = []
+        state = start
+        while state != initial:
+            state, label = parents[state]
+            prefix.append(label)
+        prefix.reverse()
+
+        # Go around the SCC through an edge with each of the marks and back.
+        cycle = []
+        state = start
+        for mark in (LEFT_MARK, RIGHT_MARK):
+            labels, state = self._path(state, scc, lambda e: bool(e[2] & mark))
+            cycle.extend(labels)
+        labels, state = self._path(state, scc, lambda e: e[1] == start)
+        cycle.extend(labels)
+
+        bdict = self.left.get_dict()
+        word = '; '.join(spot.bdd_format_formula(bdict, label) for label in prefix)
+        cycle = '; '.join(spot.bdd_format_formula(bdict, label) for label in cycle)
+
+        return spot.parse_word(f'{word}; cycle{{{cycle}}}' if word else f'cycle{{{cycle}}}', bdict)
+
+    def _path(
+            self,
+            start: ProductState,
+            scc: Set[ProductState],
+            target: Callable[[ProductEdge], bool]
+    ) -> Tuple[List[BDD], ProductState]:
+        """Find a path inside an SCC ending by an edge satisfying `target`.
+
+        Args:
+            start (`ProductState`): State to start from.
+            scc (`Set[ProductState]`): States of the SCC.
+            target (`Callable[[ProductEdge], bool]`): Condition on the last edge.
+
+        Returns:
+            `Tuple[List[BDD], ProductState]`: Labels of the path and its last state.
+
+        """
+        parents = {start: None}
+        to_check = deque([start])
+
+        while to_check:
+            state = to_check.popleft()
+
+            for edge in self._edges[state]:
+                label, successor, _ = edge
+                if successor not in scc:
+                    continue
+
+                if target(edge):
+                    labels = [label]
+                    while parents[state] is not None:
+                        state, label = parents[state]
+                        labels.append(label)
+                    labels.reverse()
+                    return labels, successor
+
+                if successor not in parents:
+                    parents[successor] = (state, label)
+                    to_check.append(successor)
+
+        raise RuntimeError('Accepting SCC of the product is not strongly connected')
+
+
+def is_included(left: spot.twa_graph, right: spot.twa_graph, args: dict = {}) -> bool:
+    """Check whether L(left) is included in L(right).
+
+    Args:
+        left (`spot.twa_graph`): Buchi automaton.
+        right (`spot.twa_graph`): Buchi automaton complemented by PBS.
+        args (`dict`, optional): Arguments for `PBS`.
+
+    Returns:
+        bool: `True` if the language of `left` is included in the language of `right`.
+
+    """
+    return InclusionChecker(left, right, args).is_included()
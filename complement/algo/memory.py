@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Memory accounting of complementations.
+
+A `MemoryAccountant` samples the memory used by the main structures of an
+exploration every given number of macrostates: the map from macrostates to
+the states of the output automaton, each of the caches of the algorithm and
+the output automaton of Spot, together with the memory traced by tracemalloc.
+At the end it adds the names of the states and the distribution of the sizes
+of the sets P, B and S among the found macrostates.
+
+Python structures are measured by `deep_size`, objects shared by several
+structures are counted in each of them. The size of the output automaton is
+estimated from its numbers of states and edges, without the BDDs of its labels.
+Sampling goes through all the measured structures, so it slows the exploration
+down and is meant for analysis only.
+
+"""
+
+import sys
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# Estimated bytes per state and per edge of a `spot.twa_graph`.
+SPOT_STATE_BYTES = 8
+SPOT_EDGE_BYTES = 32
+
+
+def deep_size(obj: Any) -> int:
+    """Get the size of an object with everything it contains in bytes.
+
+    Containers are followed into their items, every object is counted once.
+
+    Args:
+        obj: The measured object.
+
+    Returns:
+        int: Sum of `sys.getsizeof` of the object and the objects it contains.
+
+    """
+    seen = set()
+    size = 0
+    to_check = [obj]
+
+    while to_check:
+        current = to_check.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+
+        size += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            to_check.extend(current.keys())
+            to_check.extend(current.values())
+        elif isinstance(current, (tuple, list, set, frozenset)):
+            to_check.extend(current)
+
+    return size
+
+
+class MemoryAccountant:
+    """Sampler of the memory used by the structures of an exploration.
+
+    Attributes:
+        algorithm: The measured algorithm, its caches, encoding and output
+            automaton are used.
+        states (int): Sample every this many explored macrostates.
+        samples (`List[dict]`): Sizes of the structures in bytes at each sample.
+
+    """
+
+    def __init__(self, algorithm: Any, states: int = 1000):
+        if states < 1:
+            raise ValueError('Period of memory samples must be positive')
+
+        self.algorithm = algorithm
+        self.states = states
+        self.samples = []
+
+        self.explored = 0
+        self.names_size = None
+        self.distributions = None
+
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def update(self, state_map: Dict[Any, int], output: bool = True):
+        """Record an explored macrostate and sample if the period has passed.
+
+        Args:
+            state_map (`Dict[Macrostate, int]`): Map from the found macrostates to
+                the numbers of the states.
+            output (bool): Whether the output automaton is built.
+        """
+        self.explored += 1
+
+        if self.explored % self.states == 0:
+            self.sample(state_map, output)
+
+    def sample(self, state_map: Dict[Any, int], output: bool = True):
+        """Measure the structures of the exploration.
+
+        Args:
+            state_map (`Dict[Macrostate, int]`): Map from the found macrostates to
+                the numbers of the states.
+            output (bool): Whether the output automaton is built.
+        """
+        sizes = {'state_map': deep_size(state_map)}
+
+        for name, cache in self.algorithm.cache.items():
+            sizes[f'cache_{name}'] = deep_size(cache.entries())
+
+        if output:
+            automaton = self.algorithm.output_automaton
+            sizes['spot_graph'] = automaton.num_states() * SPOT_STATE_BYTES + automaton.num_edges() * SPOT_EDGE_BYTES
+
+        current, peak = tracemalloc.get_traced_memory()
+
+        self.samples.append({
+            'explored': self.explored,
+            'macrostates': len(state_map),
+            'sizes': sizes,
+            'traced': current,
+            'traced_peak': peak
+        })
+
+    def finish(self, state_map: Dict[Any, int], names: Optional[List[str]] = None, output: bool = True):
+        """Take the last sample, measure the names and the distributions of sizes.
+
+        Args:
+            state_map (`Dict[Macrostate, int]`): Map from the found macrostates to
+                the numbers of the states.
+            names (`Optional[List[str]]`): Names of the states, if they are kept.
+            output (bool): Whether the output automaton is built.
+        """
+        self.sample(state_map, output)
+
+        if names is not None:
+            self.names_size = deep_size(names)
+
+        size = self.algorithm.encoding.size
+        P_sizes = Counter()
+        B_sizes = Counter()
+        S_sizes = Counter()
+        for P, B, S in state_map:
+            P_sizes[size(P)] += 1
+            B_sizes[size(B)] += 1
+            S_sizes[len(S)] += 1
+
+        self.distributions = {
+            'P': dict(sorted(P_sizes.items())),
+            'B': dict(sorted(B_sizes.items())),
+            'S': dict(sorted(S_sizes.items()))
+        }
+
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self) -> Dict[str, Any]:
+        """Get the samples, the peaks of the structures and the distributions.
+
+        Returns:
+            `Dict[str, Any]`: The samples, the largest size of each structure over
+                the samples, the peak of traced memory, the size of the names and
+                the numbers of macrostates by the sizes of P, B and S.
+
+        """
+        peaks = dict()
+        for sample in self.samples:
+            for name, value in sample['sizes'].items():
+                peaks[name] = max(peaks.get(name, 0), value)
+        if self.names_size is not None:
+            peaks['names'] = self.names_size
+
+        return {
+            'samples': self.samples,
+            'peaks': peaks,
+            'traced_peak': max((sample['traced_peak'] for sample in self.samples), default=None),
+            'distributions': self.distributions
+        }
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""Parallel exploration of the PBS complement.
+
+This module explores the macrostates of a single PBS complementation in several
+worker processes. The frontier of each breadth-first level is sharded by the hash
+of the macrostates, so that every worker keeps expanding the same part of the
+state space with its own successor caches. Workers exchange new macrostates with
+the master in batches and the master assembles the output automaton.
+
+"""
+
+import multiprocessing
+import traceback
+from queue import Empty
+from typing import Dict, List
+
+import spot
+import buddy
+
+from .base import BDD
+from .pbs import PBS
+
+
+def _worker(hoa: str, args: dict, tasks: multiprocessing.Queue, results: multiprocessing.Queue):
+    """Expand batches of macrostates until told to stop.
+
+    Letters are sent as formulas, as BDDs cannot be passed between processes and
+    the order of the alphabet depends on the order of the edges, which need not
+    be the same in the automaton parsed from HOA as in the one of the master.
+
+    Args:
+        hoa (str): The input automaton in HOA.
+        args (dict): Arguments for `PBS`.
+        tasks (`multiprocessing.Queue`): Batches of macrostates, `None` to stop.
+        results (`multiprocessing.Queue`): Expanded batches or error messages.
+    """
+    try:
+        pbs = PBS(spot.automaton(hoa), args)
+        bdict = pbs.input_automaton.get_dict()
+        formulas = {letter: spot.bdd_format_formula(bdict, letter) for letter in pbs.alphabet}
+
+        while True:
+            batch = tasks.get()
+            if batch is None:
+                break
+
+            expanded = []
+            for state in batch:
+                edges = dict()
+                for letter, successor, accepting in pbs.macrostate_successors(state):
+                    edges.setdefault((successor, accepting), []).append(formulas[letter])
+
+                expanded.append((state, list(edges.items())))
+
+            results.put(('ok', expanded))
+    except Exception:
+        results.put(('error', traceback.format_exc()))
+
+
+class ParallelPBS(PBS):
+    """PBS with the exploration spread over several processes.
+
+    The macrostates of each breadth-first level are expanded by the workers and
+    the output automaton is built by the master, which only numbers the found
+    macrostates and does not build the indexes of the input automaton needed
+    for the exploration. The result has the same states and edges as the one of
+    `PBS`, but the states may be numbered differently, as the workers explore
+    the letters in the order of the edges of the automaton parsed from HOA.
+
+    The number of workers is given by the `workers` argument (2 by default) and
+    the number of macrostates sent to a worker at once by `batch_size` (64). If
+    a worker dies, for example killed for lack of memory, `complement` raises
+    `RuntimeError`. The phases run in the workers are not profiled.
+
+    """
+
+    # Only the workers explore the complement.
+    EXPLORES = False
+
+    def __init__(self, input_automaton: spot.twa_graph, args: dict = {}):
+        super().__init__(input_automaton, args)
+
+        self.args.setdefault('workers', 2)
+        self.args.setdefault('batch_size', 64)
+
+        if self.args['workers'] < 1:
+            raise ValueError('Number of workers must be positive')
+
+    def complement(self):
+        workers = self.args['workers']
+        worker_args = {k: v for k, v in self.args.items() if k not in ('workers', 'batch_size', 'profile', 'progress', 'memory')}
+        # Workers get the already preprocessed input automaton.
+        worker_args['preprocess'] = 'none'
+
+        hoa = self.input_automaton.to_str('hoa')
+        results = multiprocessing.Queue()
+        queues = [multiprocessing.Queue() for _ in range(workers)]
+        processes = [
+            multiprocessing.Process(target=_worker, args=(hoa, worker_args, queue, results), daemon=True)
+            for queue in queues
+        ]
+
+        for process in processes:
+            process.start()
+
+        try:
+            return self._explore(queues, results, processes)
+        finally:
+            for queue in queues:
+                queue.put(None)
+            for process in processes:
+                # Workers left with undelivered results after a failure would
+                # never finish on their own.
+                process.join(timeout=1)
+                if process.is_alive():
+                    process.terminate()
+
+    def _explore(self, queues: List[multiprocessing.Queue], results: multiprocessing.Queue,
+                 processes: List[multiprocessing.Process]) -> spot.twa_graph:
+        """Explore the complement level by level using the workers.
+
+        Args:
+            queues (`List[multiprocessing.Queue]`): Task queues of the workers.
+            results (`multiprocessing.Queue`): Shared queue of results.
+            processes (`List[multiprocessing.Process]`): The workers.
+
+        Returns:
+            `spot.twa_graph`: The complement.
+
+        """
+        batch_size = self.args['batch_size']
+
+        # Letters received from the workers by their formulas.
+        letters = dict()
+
+        initial_state = self.initial_macrostate()
+
+        state_map = dict()
+        state_map[initial_state] = self.output_automaton.new_state()
+
+        self.output_automaton.set_init_state(state_map[initial_state])
+
+        frontier = [initial_state]
+        while frontier:
+            shards = [[] for _ in queues]
+            for state in frontier:
+                shards[hash(state) % len(queues)].append(state)
+
+            sent = 0
+            for queue, shard in zip(queues, shards):
+                for i in range(0, len(shard), batch_size):
+                    queue.put(shard[i:i + batch_size])
+                    sent += 1
+
+            expanded = dict()
+            for _ in range(sent):
+                status, payload = self._receive(results, processes)
+                if status == 'error':
+                    raise RuntimeError(f'PBS worker failed:\n{payload}')
+                expanded.update(payload)
+
+            # Number new states in the order of the frontier, independently
+            # of the order in which the workers finished.
+            next_frontier = []
+            for i, state_now in enumerate(frontier):
+                for (new_state, accepting), formulas in expanded[state_now]:
+                    if new_state not in state_map:
+                        # We got a new state to process.
+                        state_map[new_state] = self.output_automaton.new_state()
+                        next_frontier.append(new_state)
+
+                    label = buddy.bddfalse
+                    for formula in formulas:
+                        label |= self._letter(formula, letters)
+
+                    if not accepting:
+                        self.output_automaton.new_edge(state_map[state_now], state_map[new_state], label)
+                    else:
+                        self.output_automaton.new_edge(state_map[state_now], state_map[new_state], label, [0])
+
+                if self.progress is not None:
+                    waiting = len(frontier) - i - 1 + len(next_frontier)
+                    self.progress.update(len(state_map), waiting, len(expanded[state_now]))
+
+                if self.memory is not None:
+                    self.memory.update(state_map)
+
+            frontier = next_frontier
+
+        if self.progress is not None:
+            self.progress.report(len(state_map), 0, done=True)
+
+        names = self.get_state_names(state_map)
+
+        if self.memory is not None:
+            self.memory.finish(state_map, names)
+
+        self.output_automaton.set_state_names(names)
+        self.output_automaton.merge_edges()
+
+        return self.output_automaton
+
+    def _letter(self, formula: str, letters: Dict[str, BDD]) -> BDD:
+        """Get the letter of a formula sent by a worker.
+
+        Args:
+            formula (str): The letter as a formula.
+            letters (`Dict[str, BDD]`): Letters already received by their formulas.
+
+        Returns:
+            `BDD`: The letter over the BDD variables of the input automaton.
+
+        """
+        letter = letters.get(formula)
+        if letter is None:
+            letter = spot.formula_to_bdd(spot.formula(formula), self.input_automaton.get_dict(), self.input_automaton)
+            letters[formula] = letter
+
+        return letter
+
+    @staticmethod
+    def _receive(results: multiprocessing.Queue, processes: List[multiprocessing.Process], poll: float = 1.0) -> tuple:
+        """Wait for a result of a worker, checking that the workers still run.
+
+        Args:
+            results (`multiprocessing.Queue`): Shared queue of results.
+            processes (`List[multiprocessing.Process]`): The workers.
+            poll (float): Seconds between the checks of the workers.
+
+        Returns:
+            tuple: Status and payload of the result.
+
+        """
+        while True:
+            try:
+                return results.get(timeout=poll)
+            except Empty:
+                for process in processes:
+                    if not process.is_alive():
+                        raise RuntimeError(f'PBS worker died with exit code {process.exitcode}')
@@ -5,9 +5,21 @@ This module implements the PBS complementation algorithm as defined in my thesis
 
 """
 
-from typing import List, Set, Dict, FrozenSet, Tuple
-
-from .base import ComplementationAlgorithm, States, MetaStates
+from itertools import chain, combinations, islice
+from typing import Callable, List, Iterable, Iterator, Optional, Set, Dict, FrozenSet, TextIO, Tuple
+
+from .base import ComplementationAlgorithm, BDD, States, MetaStates
+from .cache import MISSING
+from .hoa import HOAWriter
+from .memory import MemoryAccountant
+from .profiling import Profiler
+from .progress import ProgressReporter
+from .vectorized import get_engine
+
+# A state of the complement given by the sets P, B and S.
+Macrostate = Tuple[States, States, MetaStates]
+# Images of a macrostate for a letter, see `PBS.letter_images`.
+LetterImages = Tuple[BDD, States, States, States, Set[States], MetaStates, bool]
 
 import spot
 import buddy
@@ -18,126 +30,466 @@ class PBS(ComplementationAlgorithm):
 
     This class provides access to the PBS complementation algorithm.
 
+    Besides building the whole complement by `complement`, the complement can be
+    explored lazily from `initial_macrostate` by `macrostate_successors`.
+
+    Attributes:
+        state_filter (`Optional[Callable[[Tuple[int, int]], bool]]`): Filter of
+            successors in B and S given by the used optimizations.
+        metastate_filter (`Callable[[MetaStates], bool]`): Filter of successors
+            of S given by the used optimizations.
+        engine: Engine computing images of macrostates for all letters at once,
+            `None` if they are computed letter by letter.
+        B_to_S_limit (`Optional[int]`): Maximal number of combinations of states
+            leaving B for S generated for a single successor, `None` for no limit.
+        B_to_S_order (str): Order of these combinations, see `B_TO_S_ORDERS`.
+        progress (`Optional[ProgressReporter]`): Reporter of the progress of the
+            exploration if the `progress` argument gives its settings, `None` otherwise.
+        memory (`Optional[MemoryAccountant]`): Sampler of the memory used by the
+            exploration if the `memory` argument gives its settings, `None` otherwise.
+        profiler (`Optional[Profiler]`): Profiler of the phases of `complement`
+            if the `profile` argument is set, `None` otherwise.
+
     """
 
+    # Methods measured by the profiler, see `profiling`.
+    PHASES = (
+        'gather_edges', 'macrostate_successors', 'letter_images', 'fused_images', '_state_successors',
+        'B_to_S', 'trim_B', 'prune_subsumed', 'create_edges', 'get_state_names'
+    )
+
+    # Orders of combinations of states leaving B for S by their size.
+    B_TO_S_ORDERS = ('smallest', 'largest')
+
     def __init__(self, input_automaton: spot.twa_graph, args: dict = {}):
         super().__init__(input_automaton, args)
 
         # Add new optimization options.
-        self.args.update({
-            'optimizations': {
-                'use_scc': True,
-                'use_hopeful': True,
-                'restrict_B_to_S': True
-            }
-        })
+        optimizations = {
+            'use_scc': True,
+            'use_hopeful': True,
+            'restrict_B_to_S': True,
+            'use_subsumption': False
+        }
         # Update with actual arguments.
-        self.args.update(args)
+        optimizations.update(args.get('optimizations', dict()))
+        self.args['optimizations'] = optimizations
+
+        # Setup filter for successor methods depending on used optimizations.
+        self.state_filter = None
+
+        if self.args['optimizations']['use_scc']:
+            self.state_filter = lambda t: self._scc_filter(t[0], t[1])
+
+        # Setup metastate filter for S
+        self.metastate_filter = lambda s: True
+
+        if self.args['optimizations']['use_hopeful']:
+            self.metastate_filter = self._hopeful_filter
+
+        # Setup generation of states leaving B for S.
+        self.B_to_S_limit = self.args.get('B_to_S_limit')
+        self.B_to_S_order = self.args.get('B_to_S_order', 'smallest')
+
+        if self.B_to_S_limit is not None and self.B_to_S_limit < 1:
+            raise ValueError('Limit of combinations leaving B for S must be positive')
+        if self.B_to_S_order not in self.B_TO_S_ORDERS:
+            raise ValueError(f'Unknown order of combinations leaving B for S: {self.B_to_S_order}')
+
+        # Setup engine computing images of macrostates.
+        self.engine = get_engine(self.args.get('engine', 'python'), self) if self.EXPLORES else None
+
+        # Progress is reported only if requested, see `ProgressReporter`.
+        self.progress = None
+
+        if self.args.get('progress'):
+            self.progress = ProgressReporter(self, **self.args['progress'])
+
+        # Memory is accounted only if requested, see `MemoryAccountant`.
+        self.memory = None
+
+        if self.args.get('memory'):
+            self.memory = MemoryAccountant(self, **self.args['memory'])
+
+        # Methods are measured only if profiling is requested.
+        self.profiler = None
+
+        if self.args.get('profile'):
+            self.profiler = Profiler()
+            self.profiler.attach(self, self.PHASES)
 
     def complement(self):
-        initial_state = frozenset([self.input_automaton.get_init_state_number()]), frozenset(), frozenset()
+        profiler = self.profiler
+        progress = self.progress
+        memory = self.memory
+
+        initial_state = self.initial_macrostate()
 
         state_map = dict()
         state_map[initial_state] = self.output_automaton.new_state()
 
         self.output_automaton.set_init_state(state_map[initial_state])
 
-        # Setup filter for successor methods depending on used optimizations.
-        state_filter = lambda s: True
+        todo = [initial_state]
 
-        if self.args['optimizations']['use_scc']:
-            state_filter = lambda t: self._scc_filter(t[0], t[1])
+        def discover(new_state: Macrostate) -> int:
+            if new_state not in state_map:
+                # We got a new state to process.
+                state_map[new_state] = self.output_automaton.new_state()
+                todo.append(new_state)
 
-        # Setup metastate filter for S
-        metastate_filter = lambda s: True
+            return state_map[new_state]
 
-        if self.args['optimizations']['use_hopeful']:
-            metastate_filter = self._hopeful_filter
+        while todo:
+            if profiler is not None:
+                profiler.peak('frontier_peak', len(todo))
+
+            state_now = todo.pop(0)
+
+            edges = self.gather_edges(state_now, discover)
+
+            self.create_edges(state_map[state_now], edges)
+
+            if progress is not None:
+                progress.update(len(state_map), len(todo), len(edges))
+
+            if memory is not None:
+                memory.update(state_map)
+
+        if progress is not None:
+            progress.report(len(state_map), 0, done=True)
+
+        names = self.get_state_names(state_map)
+
+        if memory is not None:
+            memory.finish(state_map, names)
+
+        self.output_automaton.set_state_names(names)
+
+        if profiler is None:
+            self.output_automaton.merge_edges()
+        else:
+            profiler.count('macrostates', len(state_map))
+            profiler.count('edges_created', self.output_automaton.num_edges())
+            with profiler.phase('merge_edges'):
+                self.output_automaton.merge_edges()
+
+        return self.output_automaton
+
+    def create_edges(self, src: int, edges: Dict[Tuple[int, bool], BDD]):
+        """Create outgoing edges of a state of the output automaton.
+
+        Args:
+            src (int): Number of the state.
+            edges (`Dict[Tuple[int, bool], BDD]`): Edges given by `gather_edges`.
+
+        """
+        for (dst, accepting), label in edges.items():
+            if not accepting:
+                self.output_automaton.new_edge(src, dst, label)
+            else:
+                self.output_automaton.new_edge(src, dst, label, [0])
+
+    def complement_to_hoa(self, stream: TextIO, names: str = 'keep', names_stream: Optional[TextIO] = None,
+                          comment: Optional[str] = None) -> int:
+        """Run the complementation and stream the complement in HOA.
+
+        Each state is written as soon as all its successors are known, the output
+        automaton is never built. Names of the macrostates are either written
+        along with the states, dropped, or written to a separate stream as lines
+        with the number and the name of each state, so that they are never kept
+        in memory.
+
+        Args:
+            stream (`TextIO`): Stream to write the complement to.
+            names (str): `keep` to name the states in the HOA, `drop` to not
+                name them at all and `external` to write the names to `names_stream`.
+            names_stream (`Optional[TextIO]`): Stream for the names of the states.
+            comment (`Optional[str]`): Comment written after the first line of
+                the header, see `HOAWriter`.
+
+        Returns:
+            int: Number of states of the complement.
+
+        """
+        if names not in ('keep', 'drop', 'external'):
+            raise ValueError(f'Unknown handling of state names: {names}')
+        if names == 'external' and names_stream is None:
+            raise ValueError('Missing stream for the state names')
+
+        writer = HOAWriter(stream, self.input_automaton, comment=comment)
+
+        initial_state = self.initial_macrostate()
+
+        state_map = dict()
+        state_map[initial_state] = 0
 
         todo = [initial_state]
+
+        def discover(new_state: Macrostate) -> int:
+            if new_state not in state_map:
+                # We got a new state to process.
+                state_map[new_state] = len(state_map)
+                todo.append(new_state)
+
+            return state_map[new_state]
+
         while todo:
             state_now = todo.pop(0)
 
-            P = state_now[0]
-            B = state_now[1]
-            S = state_now[2]
-
-            # We try every possible minterm. If we do not have any successors
-            # we go to the "dump state" naturally.
-            for minterm in self.get_minterms(buddy.bddtrue):
-                new_P, _, _ = self.successors(P, minterm)
-                new_B, B_marked, B_nondeterministic = self.successors(B, minterm, state_filter)
-                new_S, valid = self.successors_metastates(S, minterm, state_filter, metastate_filter)
-
-                # In this case we would have an invalid state in S, thus we do not
-                # continue.
-                if not valid:
-                    continue
-
-                if not self.args['optimizations']['restrict_B_to_S']:
-                    leaving_B = self.B_to_S(new_B)
-                else:
-                    leaving_B = self.B_to_S(new_B, accepting=B_marked, nondeterministic=B_nondeterministic)
-
-                for left_B in leaving_B:
-                    accepting = False
-
-                    possible_S = set(new_S)
-                    for state in left_B:
-                        if (frozenset([state]), frozenset()) not in possible_S:
-                            possible_S.add((frozenset([state]), frozenset()))
-                    possible_B = new_B.difference(left_B)
-
-                    possible_B = self.trim_B(possible_B, frozenset(possible_S))
-
-                    if not possible_B:
-                        if self.args['optimizations']['use_scc']:
-                            possible_B = set(filter(lambda x: self.sccs.is_accepting_scc(self.sccs.scc_of(x)), new_P))
-                        else:
-                            possible_B = new_P
-                        accepting = True
-
-                        possible_B = self.trim_B(possible_B, frozenset(possible_S))
-
-                        if self.args['optimizations']['restrict_B_to_S']:
-                            # Now we want any state to be able to leave B' for S'.
-                            leaving_possible_B = self.B_to_S(possible_B)
-
-                            for left_possible_B in leaving_possible_B:
-                                possible_S_after_emptiness = set(possible_S)
-                                for state in left_possible_B:
-                                    possible_S_after_emptiness.add((frozenset([state]), frozenset()))
-                                possible_B_after_emptiness = possible_B.difference(left_possible_B)
-
-                                new_state = (
-                                new_P, frozenset(possible_B_after_emptiness), frozenset(possible_S_after_emptiness))
-                                if new_state not in state_map:
-                                    # We got a new state to process.
-                                    state_map[new_state] = self.output_automaton.new_state()
-                                    todo.append(new_state)
-
-                                if not accepting:
-                                    self.output_automaton.new_edge(state_map[state_now], state_map[new_state], minterm)
-                                else:
-                                    self.output_automaton.new_edge(state_map[state_now], state_map[new_state], minterm, [0])
-                            # We already created new states.
-                            continue
-
-                    new_state = (new_P, frozenset(possible_B), frozenset(possible_S))
-                    if new_state not in state_map:
-                        # We got a new state to process.
-                        state_map[new_state] = self.output_automaton.new_state()
-                        todo.append(new_state)
-
-                    if not accepting:
-                        self.output_automaton.new_edge(state_map[state_now], state_map[new_state], minterm)
+            edges = self.gather_edges(state_now, discover)
+
+            name = None
+            if names == 'keep':
+                name = self.state_name(state_now)
+            elif names == 'external':
+                print(state_map[state_now], self.state_name(state_now), file=names_stream)
+
+            writer.state(
+                state_map[state_now],
+                ((dst, label, accepting) for (dst, accepting), label in sorted(edges.items(), key=lambda e: e[0])),
+                name
+            )
+
+            if self.progress is not None:
+                self.progress.update(len(state_map), len(todo), len(edges))
+
+            if self.memory is not None:
+                self.memory.update(state_map, output=False)
+
+        if self.progress is not None:
+            self.progress.report(len(state_map), 0, done=True)
+
+        if self.memory is not None:
+            self.memory.finish(state_map, output=False)
+
+        writer.close(len(state_map))
+
+        return len(state_map)
+
+    def gather_edges(self, state_now: Macrostate, discover: Callable[[Macrostate], int]) -> Dict[Tuple[int, bool], BDD]:
+        """Get the outgoing edges of a macrostate merged by their destination.
+
+        The letters of all the transitions to the same successor with the same
+        acceptance are gathered into a single label, so that a single edge is
+        created for them.
+
+        Args:
+            state_now (`Macrostate`): The triple (P, B, S) to get edges of.
+            discover (`Callable[[Macrostate], int]`): Gets the number of a successor,
+                numbering it first if it was not seen yet.
+
+        Returns:
+            `Dict[Tuple[int, bool], BDD]`: Map from the numbers of the successors and
+                the acceptance of the edges to their labels.
+
+        """
+        edges = dict()
+        for minterm, new_state, accepting in self.macrostate_successors(state_now):
+            key = (discover(new_state), accepting)
+            edges[key] = edges.get(key, buddy.bddfalse) | minterm
+
+        return edges
+
+    def initial_macrostate(self) -> Macrostate:
+        """Get the initial macrostate of the complement.
+
+        Returns:
+            `Macrostate`: The triple (P, B, S) of the initial state.
+
+        """
+        encoding = self.encoding
+
+        return (
+            encoding.single(self.input_automaton.get_init_state_number()),
+            encoding.empty,
+            encoding.metastates(())
+        )
+
+    def letter_images(self, state_now: Macrostate) -> Iterator[LetterImages]:
+        """Get images of the sets of a macrostate for every letter.
+
+        The images are computed either letter by letter by `fused_images`, or
+        for all the letters at once by the engine given by the `engine` argument
+        (see `vectorized`).
+
+        Args:
+            state_now (`Macrostate`): The triple (P, B, S) to get images of.
+
+        Yields:
+            `LetterImages`: A letter from `alphabet`, the successors of P, the
+                successors of B with those reached by an accepting edge and the
+                sets of nondeterministic successors, the successors of S and
+                whether they are valid.
+
+        """
+        P = state_now[0]
+        B = state_now[1]
+        S = state_now[2]
+
+        if self.engine is not None:
+            yield from self.engine.images(P, B, S)
+            return
+
+        # We try every class of letters the input automaton can distinguish.
+        # If we do not have any successors we go to the "dump state" naturally.
+        for minterm in self.alphabet:
+            yield self.fused_images(P, B, S, minterm)
+
+    def fused_images(self, P: States, B: States, S: MetaStates, minterm: BDD) -> LetterImages:
+        """Get images of the sets of a macrostate for a letter in a single pass.
+
+        The successors of every state of the macrostate are looked up only once,
+        the images of P, B and of both components of the metastates of S are then
+        unions of these successors.
+
+        Images of single metastates are cached in the `successor_S` cache, only
+        the states of the metastates missing there are looked up.
+
+        Args:
+            P (`States`): Set P.
+            B (`States`): Set B.
+            S (`MetaStates`): Set S.
+            minterm (`BDD`): A letter from `alphabet` to calculate successors for.
+
+        Returns:
+            `LetterImages`: The same as one item of `letter_images`.
+
+        """
+        encoding = self.encoding
+        members = encoding.members
+        union = encoding.union
+        filtered = self.state_filter is not None
+
+        cached = self.cache['successor_S']
+
+        metastate_images = []
+        pending = []
+        for metastate in S:
+            result = cached.get((minterm, metastate, filtered))
+            if result is MISSING:
+                pending.append(metastate)
+            else:
+                metastate_images.append(result)
+
+        # States whose successors restricted by the state filter are needed.
+        tracked = union(chain([B], chain.from_iterable(pending)))
+        if not filtered:
+            tracked = tracked | P
+
+        # Successors and successors by an accepting edge of single states.
+        looked_up = {s: self._state_successors(s, minterm, self.state_filter) for s in members(tracked)}
+        if not filtered:
+            unfiltered = looked_up
+        else:
+            unfiltered = {s: self._state_successors(s, minterm) for s in members(P)}
+
+        new_P = union(unfiltered[s][0] for s in members(P))
+
+        B_successors = [looked_up[s] for s in members(B)]
+        new_B = union(successors for successors, _ in B_successors)
+        B_marked = union(marked for _, marked in B_successors)
+        B_nondeterministic = {successors for successors, _ in B_successors if encoding.size(successors) > 1}
+
+        # Images of the components of S, which often share the same sets.
+        images = dict()
+
+        def image(states: States) -> Tuple[States, States]:
+            if states not in images:
+                successors = [looked_up[s] for s in members(states)]
+                images[states] = (union(succ for succ, _ in successors), union(marked for _, marked in successors))
+            return images[states]
+
+        for metastate in pending:
+            powerset, breakpoint = metastate
+            successor_powerset, marked = image(powerset)
+            successor_breakpoint = image(breakpoint)[0] | marked
+
+            result = (successor_powerset, successor_breakpoint)
+            cached[(minterm, metastate, filtered)] = result
+            metastate_images.append(result)
+
+        # Cut off preemptively to avoid accepting in the input automaton.
+        valid = all(powerset != breakpoint for powerset, breakpoint in metastate_images)
+
+        new_S = encoding.metastates(metastate_images)
+
+        if not self.metastate_filter(new_S):
+            valid = False
+
+        return minterm, new_P, new_B, B_marked, B_nondeterministic, new_S, valid
+
+    def macrostate_successors(self, state_now: Macrostate) -> Iterator[Tuple[BDD, Macrostate, bool]]:
+        """Get successors of a macrostate of the complement.
+
+        The successors are computed lazily, so that the complement can be explored
+        on the fly without building the whole output automaton. The same successor
+        can be given more than once.
+
+        Args:
+            state_now (`Macrostate`): The triple (P, B, S) to get successors of.
+
+        Yields:
+            `Tuple[BDD, Macrostate, bool]`: A letter from `alphabet`, the successor
+                for this letter and whether the transition to it is accepting.
+
+        """
+        encoding = self.encoding
+
+        for minterm, new_P, new_B, B_marked, B_nondeterministic, new_S, valid in self.letter_images(state_now):
+            # In this case we would have an invalid state in S, thus we do not
+            # continue.
+            if not valid:
+                continue
+
+            if self.args['optimizations']['use_subsumption']:
+                new_S = self.prune_subsumed(new_S)
+
+            if not self.args['optimizations']['restrict_B_to_S']:
+                leaving_B = self.B_to_S(new_B)
+            else:
+                leaving_B = self.B_to_S(new_B, accepting=B_marked, nondeterministic=B_nondeterministic)
+
+            for left_B in leaving_B:
+                accepting = False
+
+                possible_S = set(new_S)
+                for state in encoding.members(left_B):
+                    if (encoding.single(state), encoding.empty) not in possible_S:
+                        possible_S.add((encoding.single(state), encoding.empty))
+                possible_B = encoding.difference(new_B, left_B)
+
+                possible_B = self.trim_B(possible_B, possible_S)
+
+                if not possible_B:
+                    if self.args['optimizations']['use_scc']:
+                        possible_B = encoding.make(filter(
+                            lambda x: self.sccs.is_accepting_scc(self.sccs.scc_of(x)),
+                            encoding.members(new_P)
+                        ))
                     else:
-                        self.output_automaton.new_edge(state_map[state_now], state_map[new_state], minterm, [0])
+                        possible_B = new_P
+                    accepting = True
 
-        self.output_automaton.set_state_names(self.get_state_names(state_map))
-        self.output_automaton.merge_edges()
+                    possible_B = self.trim_B(possible_B, possible_S)
 
-        return self.output_automaton
+                    if self.args['optimizations']['restrict_B_to_S']:
+                        # Now we want any state to be able to leave B' for S'.
+                        leaving_possible_B = self.B_to_S(possible_B)
+
+                        for left_possible_B in leaving_possible_B:
+                            possible_S_after_emptiness = set(possible_S)
+                            for state in encoding.members(left_possible_B):
+                                possible_S_after_emptiness.add((encoding.single(state), encoding.empty))
+                            possible_B_after_emptiness = encoding.difference(possible_B, left_possible_B)
+
+                            yield minterm, (
+                                new_P, possible_B_after_emptiness, encoding.metastates(possible_S_after_emptiness)
+                            ), accepting
+                        # We already created new states.
+                        continue
+
+                yield minterm, (new_P, possible_B, encoding.metastates(possible_S)), accepting
 
     def _scc_filter(self, edge_src: int, edge_dst: int) -> bool:
         """Filter states not in the same SCC as source state and not in an accepting SCC.
@@ -174,7 +526,7 @@ class PBS(ComplementationAlgorithm):
 
             # We also cut off preemptively when there are no hopeful states in the
             # powerset, if we are optimizing by hopeful states.
-            if not list(filter(lambda s: self.is_hopeful_state(s), ps)):
+            if not ps & self.hopeful:
                 return False
 
         return True
@@ -184,63 +536,111 @@ class PBS(ComplementationAlgorithm):
             B: States,
             accepting: States = None,
             nondeterministic: Set[States] = None
-    ) -> FrozenSet[States]:
-        """Compute possible combinations of states leaving from B to S.
+    ) -> Iterator[States]:
+        """Generate possible combinations of states leaving from B to S.
 
-        The computation either takes all subsets of B, or only subsets of the union
+        The combinations are either all subsets of B, or only subsets of the union
         of the states of B to which we got by an accepting or nondeterministic transition.
+        With the `use_hopeful` optimization only hopeful states can leave B, so
+        the candidates are restricted to hopeful states before the subsets are
+        enumerated and every combination is generated exactly once.
+
+        The subsets are generated lazily by their size, the smallest first unless
+        the `B_to_S_order` argument is `largest`. At most `B_to_S_limit` of them
+        are generated if the argument is given. Dropping combinations drops
+        successors of the complement, so a limit trades completeness of the
+        complement for a bounded expansion of macrostates with large B.
 
         Args:
             B (States): States in B.
             accepting (States): States in B that we got to through by an accepting transition.
             nondeterministic (States): States in B that we got to through a nondeterministic transition.
 
-        Return:
-            FrozenSet[States]: Possible combinations of states in B that will leave B for S.
+        Yields:
+            States: Possible combinations of states in B that will leave B for S.
 
         """
-        powerset_of_B = self.powerset(B)
-
-        final = powerset_of_B
+        candidates = B
 
         # If we are given accepting and nondeterministic successors of B, we want
         # to restrict the states moving to S only to those successors.
         if accepting and nondeterministic:
             # Flatten the targets of nondeterministic transitions to a single set.
-            nondeterministic_flat = {s for states in nondeterministic for s in states}
-            final = self.powerset(accepting.union(nondeterministic_flat))
+            candidates = accepting | self.encoding.union(nondeterministic)
 
-        combinations = set()
+        if self.args['optimizations']['use_hopeful']:
+            candidates = candidates & self.hopeful
 
-        for combination in final:
-            if self.args['optimizations']['use_hopeful']:
-                filtered = frozenset(filter(lambda s: self.is_hopeful_state(s), combination))
-            else:
-                filtered = combination
+        members = list(self.encoding.members(candidates))
+
+        sizes = range(len(members) + 1)
+        if self.B_to_S_order == 'largest':
+            sizes = reversed(sizes)
 
-            combinations.add(filtered)
+        subsets = chain.from_iterable(combinations(members, r) for r in sizes)
 
-        return frozenset(combinations)
+        for combination in islice(subsets, self.B_to_S_limit):
+            yield self.encoding.make(combination)
 
-    @staticmethod
-    def trim_B(B: States, S: MetaStates) -> States:
+    def prune_subsumed(self, S: MetaStates) -> MetaStates:
+        """Remove metastates of S subsumed by other metastates.
+
+        Used for the `use_subsumption` optimization.
+
+        A metastate (A, C) is subsumed by a metastate (A, D) with the same powerset
+        if C is a proper subset of D. As the breakpoints stay subsets of the powerset
+        and successors preserve inclusion, (A, C) stays valid as long as (A, D) does,
+        so dropping it does not change the language of the macrostate. Only the
+        maximal metastates are kept, which merges macrostates differing only in
+        subsumed metastates.
+
+        Singletons with an empty breakpoint, which `trim_B` relies on, are never
+        subsumed by a valid metastate.
+
+        Args:
+            S (`MetaStates`): Set S.
+
+        Returns:
+            `MetaStates`: Set S without the subsumed metastates.
+
+        """
+        breakpoints = dict()
+        for powerset, breakpoint in S:
+            breakpoints.setdefault(powerset, []).append(breakpoint)
+
+        if len(breakpoints) == len(S):
+            return S
+
+        issubset = self.encoding.issubset
+
+        maximal = []
+        for powerset, candidates in breakpoints.items():
+            for breakpoint in candidates:
+                if not any(other != breakpoint and issubset(breakpoint, other) for other in candidates):
+                    maximal.append((powerset, breakpoint))
+
+        return self.encoding.metastates(maximal)
+
+    def trim_B(self, B: States, S: Iterable[Tuple[States, States]]) -> States:
         """Trim B of singletons in S.
 
         Trims B by going over the metastates in S of which the first component
         is a singleton and the second one is an empty set.
 
         Args:
-            B (`FrozenSet[int]`): Set B.
-            S (`FrozenSet[int]`): Set S.
+            B (`States`): Set B.
+            S (`Iterable[Tuple[States, States]]`): Metastates of set S.
 
         Returns:
-            `FrozenSet[int]`: Set B trimmed of the singleton states from S.
+            `States`: Set B trimmed of the singleton states from S.
         """
-        return B.difference({list(s)[0] for (s, _) in filter(lambda x: len(list(x)[0]) == 1 and not list(x)[1], S)})
+        singletons = self.encoding.union(s for (s, b) in S if self.encoding.size(s) == 1 and not b)
+
+        return self.encoding.difference(B, singletons)
 
-    @staticmethod
     def get_state_names(
-            state_map: Dict[Tuple[States, States, MetaStates], int]
+            self,
+            state_map: Dict[Macrostate, int]
     ) -> List[str]:
         """Get state labels.
 
@@ -255,11 +655,23 @@ class PBS(ComplementationAlgorithm):
             `List[str]`: List of names in the order given in `state_map`.
 
         """
-        labels = []
-        for (P, B, S), state in state_map.items():
-            P_label = list(P)
-            B_label = list(B)
-            S_label = [(list(x), list(y)) for (x, y) in S]
-            labels.append(str((P_label, B_label, S_label)))
-
-        return labels
+        return [self.state_name(state) for state in state_map]
+
+    def state_name(self, state: Macrostate) -> str:
+        """Get a human understandable name of a single macrostate.
+
+        Args:
+            state (`Macrostate`): The triple (P, B, S).
+
+        Returns:
+            str: Name of the macrostate.
+
+        """
+        members = self.encoding.members
+
+        P, B, S = state
+        P_label = list(members(P))
+        B_label = list(members(B))
+        S_label = [(list(members(x)), list(members(y))) for (x, y) in S]
+
+        return str((P_label, B_label, S_label))
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""Racing of several complementation constructions.
+
+For some automata it cannot be predicted which construction gives the result
+soonest or the smallest result. This module runs several of them at once, each
+in its own process: PBS with different sets of optimizations, the complementation
+of Spot and, for semi-deterministic automata, NCSB. Either the first finished
+result or the smallest result finished within a time budget is taken, the
+remaining processes are killed.
+
+"""
+
+import multiprocessing
+import queue
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+
+import spot
+
+from .pbs import PBS
+
+# Ways of picking the result.
+PICKS = ('first', 'smallest')
+
+# Optimizations of the PBS entries changed against the given ones.
+PBS_VARIANTS = {
+    'pbs': {},
+    'pbs_subsumption': {'use_subsumption': True},
+    'pbs_unrestricted': {'restrict_B_to_S': False}
+}
+
+
+def _worker(name: str, hoa: str, args: dict, results: multiprocessing.Queue):
+    """Complement an automaton by a single construction of the portfolio.
+
+    Args:
+        name (str): Name of the construction, `spot`, `semidet` or one of `PBS_VARIANTS`.
+        hoa (str): The input automaton in HOA.
+        args (dict): Arguments for `PBS`.
+        results (`multiprocessing.Queue`): Queue for the result or an error message.
+    """
+    try:
+        aut = spot.automaton(hoa)
+
+        if name == 'spot':
+            res = spot.postprocess(spot.complement(aut), 'Buchi', 'Low')
+        elif name == 'semidet':
+            res = spot.complement_semidet(aut)
+        else:
+            res = PBS(aut, args).complement()
+
+        results.put((name, 'ok', res.to_str('hoa'), res.num_states(), res.num_edges()))
+    except Exception:
+        results.put((name, 'error', traceback.format_exc(), None, None))
+
+
+class Portfolio:
+    """Portfolio of complementation constructions racing against each other.
+
+    Attributes:
+        input_automaton (`spot.twa_graph`): Buchi automaton to complement.
+        args (`dict`): Arguments for `PBS`, the optimizations of the PBS entries
+            are updated by `PBS_VARIANTS`.
+        pick (str): `first` to take the first finished result, `smallest` to take
+            the result with the fewest states finished within the budget.
+        budget (`Optional[float]`): Time budget in seconds, `None` for no limit.
+        report (`List[dict]`): Names, times, sizes and statuses of the entries
+            after `complement`.
+
+    """
+
+    def __init__(self, input_automaton: spot.twa_graph, args: dict = {},
+                 pick: str = 'first', budget: Optional[float] = None):
+        if not input_automaton.acc().is_buchi():
+            raise ValueError('Input automaton must be Buchi')
+        if pick not in PICKS:
+            raise ValueError(f'Unknown way of picking the result: {pick}')
+        if budget is not None and budget <= 0:
+            raise ValueError('Time budget must be positive')
+
+        self.input_automaton = input_automaton
+        self.args = args
+        self.pick = pick
+        self.budget = budget
+        self.report = []
+
+    def entries(self) -> Dict[str, dict]:
+        """Get the constructions racing for the input automaton.
+
+        Returns:
+            `Dict[str, dict]`: Arguments for `PBS` by the names of the constructions,
+                PBS variants with the same optimizations are run only once.
+
+        """
+        entries = dict()
+        seen = []
+
+        # Reports would be written by all the entries at once.
+        args = {k: v for k, v in self.args.items() if k not in ('profile', 'progress', 'memory')}
+
+        for name, changes in PBS_VARIANTS.items():
+            optimizations = dict(args.get('optimizations', dict()))
+            optimizations.update(changes)
+
+            if optimizations not in seen:
+                seen.append(optimizations)
+                entries[name] = dict(args, optimizations=optimizations)
+
+        entries['spot'] = args
+        if spot.is_semi_deterministic(self.input_automaton):
+            entries['semidet'] = args
+
+        return entries
+
+    def complement(self) -> Tuple[str, spot.twa_graph]:
+        """Run the constructions and pick the result.
+
+        Returns:
+            `Tuple[str, spot.twa_graph]`: Name of the picked construction and its result.
+
+        """
+        hoa = self.input_automaton.to_str('hoa')
+        results = multiprocessing.Queue()
+        processes = {
+            name: multiprocessing.Process(target=_worker, args=(name, hoa, args, results), daemon=True)
+            for name, args in self.entries().items()
+        }
+
+        start = time.perf_counter()
+        for process in processes.values():
+            process.start()
+
+        try:
+            best = self._collect(results, len(processes), start)
+        finally:
+            for process in processes.values():
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        finished = {entry['name'] for entry in self.report}
+        for name in processes:
+            if name not in finished:
+                self.report.append({'name': name, 'status': 'killed', 'time': time.perf_counter() - start})
+
+        if best is None:
+            raise RuntimeError('No construction of the portfolio finished within the time budget')
+
+        name, output = best
+
+        return name, spot.automaton(output)
+
+    def _collect(self, results: multiprocessing.Queue, count: int, start: float) -> Optional[Tuple[str, str]]:
+        """Wait for the results of the entries.
+
+        Args:
+            results (`multiprocessing.Queue`): Queue of the results.
+            count (int): Number of the running entries.
+            start (float): Time at which the entries were started.
+
+        Returns:
+            `Optional[Tuple[str, str]]`: Name of the picked construction and its
+                result in HOA, `None` if no entry succeeded in time.
+
+        """
+        best = None
+        best_size = None
+
+        for _ in range(count):
+            timeout = None
+            if self.budget is not None:
+                timeout = max(0.0, self.budget - (time.perf_counter() - start))
+
+            try:
+                name, status, output, states, edges = results.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            entry = {'name': name, 'status': status, 'time': time.perf_counter() - start}
+            if status == 'ok':
+                entry.update({'states': states, 'edges': edges})
+            self.report.append(entry)
+
+            if status != 'ok':
+                continue
+
+            if best is None or (states, edges) < best_size:
+                best = (name, output)
+                best_size = (states, edges)
+
+            if self.pick == 'first':
+                break
+
+        return best
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+"""Reduction of input automata before complementation.
+
+The cost of the complementation grows exponentially with the number of input
+states, so every state removed beforehand pays off. This module provides a
+pipeline of language preserving reductions of Buchi automata applied in stages:
+
+- `trim` removes states which are unreachable or from which no accepting
+  cycle can be reached,
+- `direct` reduces the automaton by direct simulation of Spot,
+- `delayed` merges states simulating each other by delayed simulation, which
+  only requires an accepting edge of the simulating state to follow every
+  accepting edge of the simulated one eventually. Quotienting by it preserves
+  the language of Buchi automata and merges more states than direct
+  simulation, but removing little brothers does not, so no edges are removed,
+- `iterated` applies the direct simulation and cosimulation reductions of Spot
+  until the automaton does not change.
+
+A level of preprocessing runs the stages up to the stage of the same name.
+
+"""
+
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+import spot
+import buddy
+
+# Stages of the pipeline in the order they are applied.
+STAGES = ('trim', 'direct', 'delayed', 'iterated')
+LEVELS = ('none',) + STAGES
+
+BDD = Any
+# An edge of an automaton split to a single letter given by its destination and acceptance.
+LetterEdge = Tuple[int, bool]
+
+
+def preprocess(aut: spot.twa_graph, level: str = 'none') -> Tuple[spot.twa_graph, List[dict]]:
+    """Reduce a Buchi automaton by the stages of the pipeline up to a level.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+        level (str): `none`, or the last stage to apply, see `STAGES`.
+
+    Returns:
+        `Tuple[spot.twa_graph, List[dict]]`: The reduced automaton, with the same
+            BDD dictionary as `aut`, and for every applied stage its name, the
+            number of states and edges before and after it and its time in seconds.
+
+    """
+    if level not in LEVELS:
+        raise ValueError(f'Unknown level of preprocessing: {level}')
+
+    stages = STAGES[:LEVELS.index(level)]
+    report = []
+
+    for stage in stages:
+        before = (aut.num_states(), aut.num_edges())
+        start = time.perf_counter()
+
+        aut = STAGE_FUNCTIONS[stage](aut)
+
+        report.append({
+            'stage': stage,
+            'states_before': before[0],
+            'edges_before': before[1],
+            'states_after': aut.num_states(),
+            'edges_after': aut.num_edges(),
+            'time': time.perf_counter() - start
+        })
+
+    return aut, report
+
+
+def trim(aut: spot.twa_graph) -> spot.twa_graph:
+    """Remove states with an empty language and unreachable states.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `spot.twa_graph`: The trimmed automaton.
+
+    """
+    return spot.scc_filter_states(aut, True)
+
+
+def direct_simulation(aut: spot.twa_graph) -> spot.twa_graph:
+    """Reduce an automaton by direct simulation of Spot.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `spot.twa_graph`: The reduced automaton.
+
+    """
+    return spot.simulation(aut)
+
+
+def delayed_simulation(aut: spot.twa_graph) -> spot.twa_graph:
+    """Quotient an automaton by delayed simulation.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `spot.twa_graph`: The reduced automaton.
+
+    """
+    letters, edges = _letter_edges(aut)
+    simulation = _delayed_simulation(edges)
+
+    return _quotient(aut, letters, edges, simulation)
+
+
+def iterated_simulations(aut: spot.twa_graph) -> spot.twa_graph:
+    """Reduce an automaton by direct simulation and cosimulation of Spot.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `spot.twa_graph`: The reduced automaton.
+
+    """
+    return spot.iterated_simulations(aut)
+
+
+STAGE_FUNCTIONS = {
+    'trim': trim,
+    'direct': direct_simulation,
+    'delayed': delayed_simulation,
+    'iterated': iterated_simulations
+}
+
+
+def _quotient(aut: spot.twa_graph, letters: List[BDD], edges: List[List[Set[LetterEdge]]],
+              simulation: Dict[int, Set[int]]) -> spot.twa_graph:
+    """Merge states simulating each other.
+
+    A rejecting edge of a merged state is dropped if it has an accepting copy.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+        letters (`List[BDD]`): Classes of the alphabet of the automaton.
+        edges (`List[List[Set[LetterEdge]]]`): Edges of the automaton split to the
+            classes of its alphabet, see `_letter_edges`.
+        simulation (`Dict[int, Set[int]]`): Map from states to the states simulating them.
+
+    Returns:
+        `spot.twa_graph`: The quotient automaton.
+
+    """
+    # States simulating each other are merged to the smallest of them.
+    representative = dict()
+    for p in range(aut.num_states()):
+        representative[p] = min(q for q in simulation[p] if p in simulation[q])
+
+    classes = sorted(set(representative.values()))
+    number = {q: i for i, q in enumerate(classes)}
+
+    result = spot.make_twa_graph(aut.get_dict())
+    result.copy_ap_of(aut)
+    result.set_acceptance(1, 'Inf(0)')
+    result.new_states(len(classes))
+    result.set_init_state(number[representative[aut.get_init_state_number()]])
+
+    members = {q: [] for q in classes}
+    for p in range(aut.num_states()):
+        members[representative[p]].append(p)
+
+    for q in classes:
+        # Edges of all the merged states, redirected to the representatives.
+        merged = [set() for _ in letters]
+        for p in members[q]:
+            for i, successors in enumerate(edges[p]):
+                merged[i].update((representative[dst], accepting) for dst, accepting in successors)
+
+        labels = dict()
+        for i, successors in enumerate(merged):
+            for dst, accepting in _accepting_edges(successors):
+                labels[(dst, accepting)] = labels.get((dst, accepting), buddy.bddfalse) | letters[i]
+
+        for (dst, accepting), label in labels.items():
+            if accepting:
+                result.new_edge(number[q], number[dst], label, [0])
+            else:
+                result.new_edge(number[q], number[dst], label)
+
+    result.merge_edges()
+
+    return result
+
+
+def _letter_edges(aut: spot.twa_graph) -> Tuple[List[BDD], List[List[Set[LetterEdge]]]]:
+    """Split the edges of an automaton into the classes of its alphabet.
+
+    Args:
+        aut (`spot.twa_graph`): Buchi automaton.
+
+    Returns:
+        `Tuple[List[BDD], List[List[Set[LetterEdge]]]]`: The coarsest partition of
+            the alphabet induced by the edge labels and for every state and class
+            the destinations and acceptance of the edges under that class.
+
+    """
+    # Imported here, the algorithms themselves preprocess their input.
+    from .base import ComplementationAlgorithm
+
+    letters = ComplementationAlgorithm.partition_alphabet(dict.fromkeys(edge.cond for edge in aut.edges()))
+
+    edges = [[set() for _ in letters] for _ in range(aut.num_states())]
+    for edge in aut.edges():
+        for i, letter in enumerate(letters):
+            if letter & edge.cond != buddy.bddfalse:
+                edges[edge.src][i].add((edge.dst, bool(edge.acc)))
+
+    return letters, edges
+
+
+def _delayed_simulation(edges: List[List[Set[LetterEdge]]]) -> Dict[int, Set[int]]:
+    """Compute the delayed simulation relation of an automaton.
+
+    State q simulates state p if Duplicator wins the game in which Spoiler moves
+    from p by an edge, Duplicator answers from q by an edge under the same letter,
+    and every accepting edge taken by Spoiler has to be followed by an accepting
+    edge taken by Duplicator, not necessarily at the same time. Spoiler's
+    positions are pairs of states with a bit telling whether such an obligation
+    is pending, Duplicator's positions also hold the move of Spoiler to answer.
+
+    Duplicator wins the Buchi game of discharging the obligation infinitely often.
+    It is solved by the classical algorithm removing the positions won by Spoiler
+    in rounds, every round computes two attractors with counters of the moves,
+    so it is linear in the size of the game.
+
+    Args:
+        edges (`List[List[Set[LetterEdge]]]`): Edges of the automaton split to the
+            classes of its alphabet, see `_letter_edges`.
+
+    Returns:
+        `Dict[int, Set[int]]`: Map from states to the states simulating them.
+
+    """
+    n = len(edges)
+
+    def spoiler(p: int, q: int, pending: bool) -> int:
+        return (p * n + q) * 2 + pending
+
+    # Spoiler's positions are numbered first, Duplicator's ones follow.
+    spoiler_count = 2 * n * n
+    moves = [set() for _ in range(spoiler_count)]
+    answers = dict()
+    for p in range(n):
+        for q in range(n):
+            for pending in (False, True):
+                position = spoiler(p, q, pending)
+                for i, p_successors in enumerate(edges[p]):
+                    for p_dst, p_accepting in p_successors:
+                        key = (p_dst, q, pending or p_accepting, i)
+                        if key not in answers:
+                            answers[key] = len(moves)
+                            moves.append({spoiler(p_dst, q_dst, key[2] and not q_accepting)
+                                          for q_dst, q_accepting in edges[q][i]})
+                        moves[position].add(answers[key])
+
+    predecessors = [[] for _ in moves]
+    for position, successors in enumerate(moves):
+        for successor in successors:
+            predecessors[successor].append(position)
+
+    # Numbers of moves of the positions staying in the game.
+    alive = [True] * len(moves)
+    degree = [len(successors) for successors in moves]
+
+    while True:
+        # Duplicator's attractor of the positions without an obligation or
+        # where Spoiler is stuck.
+        attracted = [False] * len(moves)
+        counter = degree[:]
+        queue = [x for x in range(spoiler_count) if alive[x] and (x % 2 == 0 or not degree[x])]
+        for x in queue:
+            attracted[x] = True
+        while queue:
+            x = queue.pop()
+            for y in predecessors[x]:
+                if not alive[y] or attracted[y]:
+                    continue
+                if y < spoiler_count:
+                    counter[y] -= 1
+                    if counter[y]:
+                        continue
+                attracted[y] = True
+                queue.append(y)
+
+        # Spoiler keeps the obligation pending forever from the rest, it wins
+        # them and its attractor of them.
+        queue = [x for x in range(len(moves)) if alive[x] and not attracted[x]]
+        if not queue:
+            break
+        for x in queue:
+            alive[x] = False
+        while queue:
+            x = queue.pop()
+            for y in predecessors[x]:
+                if not alive[y]:
+                    continue
+                if y >= spoiler_count:
+                    degree[y] -= 1
+                    if degree[y]:
+                        continue
+                alive[y] = False
+                queue.append(y)
+
+    return {p: {q for q in range(n) if alive[spoiler(p, q, False)]} for p in range(n)}
+
+
+def _accepting_edges(successors: Set[LetterEdge]) -> Set[LetterEdge]:
+    """Remove rejecting edges having an accepting copy under a single letter.
+
+    Args:
+        successors (`Set[LetterEdge]`): Edges from a state under a letter.
+
+    Returns:
+        `Set[LetterEdge]`: The edges without the redundant rejecting ones.
+
+    """
+    return {(dst, accepting) for dst, accepting in successors if accepting or (dst, True) not in successors}
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Profiling of the phases of complementation algorithms.
+
+A `Profiler` measures the time spent in the methods of a single algorithm and
+counts their calls, together with counters and peaks reported by the algorithm
+itself. The methods are wrapped on the instance of the algorithm only when it
+is profiled, so an algorithm without a profiler runs its methods directly.
+
+Times are inclusive, the time of a phase called from another phase is also
+counted in the calling phase. Generators are timed only while they run, not
+while their consumer does.
+
+"""
+
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+
+class Profiler:
+    """Timers, call counters and other counters of an algorithm.
+
+    Attributes:
+        times (`Dict[str, float]`): Time spent in each phase in seconds.
+        calls (`Dict[str, int]`): Number of calls of each phase.
+        counters (`Dict[str, int]`): Counters and peaks reported by the algorithm.
+
+    """
+
+    def __init__(self):
+        self.times = dict()
+        self.calls = dict()
+        self.counters = dict()
+
+    def attach(self, algorithm: Any, phases: Iterable[str]):
+        """Wrap methods of an algorithm to measure them.
+
+        Args:
+            algorithm: The profiled algorithm.
+            phases (`Iterable[str]`): Names of the methods to measure, missing
+                methods are skipped.
+        """
+        for name in phases:
+            method = getattr(algorithm, name, None)
+            if method is None:
+                continue
+
+            self.times.setdefault(name, 0.0)
+            self.calls.setdefault(name, 0)
+            setattr(algorithm, name, self._wrap(name, method))
+
+    def _wrap(self, name: str, method: Callable) -> Callable:
+        times = self.times
+        calls = self.calls
+
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator(*args, **kwargs) -> Iterator[Any]:
+                calls[name] += 1
+                items = method(*args, **kwargs)
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        times[name] += time.perf_counter() - start
+                        return
+                    times[name] += time.perf_counter() - start
+                    yield item
+
+            return generator
+
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs) -> Any:
+            calls[name] += 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                times[name] += time.perf_counter() - start
+
+        return wrapper
+
+    @contextmanager
+    def phase(self, name: str):
+        """Measure a block of code as a phase.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name: str, value: int = 1):
+        """Increase a counter.
+
+        Args:
+            name (str): Name of the counter.
+            value (int): Increase of the counter.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def peak(self, name: str, value: int):
+        """Record a value of a quantity, keeping its maximum.
+
+        Args:
+            name (str): Name of the quantity.
+            value (int): Its current value.
+        """
+        if value > self.counters.get(name, 0):
+            self.counters[name] = value
+
+    def report(self) -> Dict[str, Any]:
+        """Get the measurements.
+
+        Returns:
+            `Dict[str, Any]`: Times and calls of the phases by their names and
+                the counters.
+
+        """
+        return {
+            'phases': {name: {'time': self.times[name], 'calls': self.calls[name]} for name in self.times},
+            'counters': dict(self.counters)
+        }
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Progress reports of long complementations.
+
+A `ProgressReporter` is told about every explored macrostate and writes a JSON
+line with the state of the exploration every given number of seconds or of
+macrostates, so that long runs can be watched and hopeless ones killed early.
+A line contains the numbers of discovered states, of states waiting in the
+frontier and of created edges, the rate of exploration in states per second,
+the sizes of the caches of the algorithm and the resident set size.
+
+"""
+
+import json
+import resource
+import sys
+import time
+from typing import Any, Optional
+
+
+def resident_set_size() -> Optional[int]:
+    """Get the current resident set size of the process in bytes.
+
+    Returns:
+        `Optional[int]`: The size, `None` if it cannot be read.
+
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ProgressReporter:
+    """Writer of periodic progress reports of an exploration.
+
+    Attributes:
+        algorithm: The reported algorithm, the sizes of its caches are reported.
+        seconds (`Optional[float]`): Report at least every this many seconds.
+        states (`Optional[int]`): Report at least every this many explored macrostates.
+        path (`Optional[str]`): File the reports are appended to, stderr if `None`.
+
+    """
+
+    def __init__(self, algorithm: Any, seconds: Optional[float] = 10.0, states: Optional[int] = None,
+                 path: Optional[str] = None):
+        if seconds is None and states is None:
+            raise ValueError('Progress has to be reported by time or by states')
+        if seconds is not None and seconds <= 0 or states is not None and states < 1:
+            raise ValueError('Period of progress reports must be positive')
+
+        self.algorithm = algorithm
+        self.seconds = seconds
+        self.states = states
+        self.path = path
+
+        self.start = time.perf_counter()
+        self.explored = 0
+        self.edges = 0
+
+        self._last_time = self.start
+        self._last_explored = 0
+
+    def update(self, discovered: int, frontier: int, edges: int):
+        """Record an explored macrostate and report if a period has passed.
+
+        Args:
+            discovered (int): Number of discovered macrostates.
+            frontier (int): Number of discovered macrostates not explored yet.
+            edges (int): Number of edges created for the explored macrostate.
+        """
+        self.explored += 1
+        self.edges += edges
+
+        if self.states is not None and self.explored - self._last_explored >= self.states:
+            self.report(discovered, frontier)
+        elif self.seconds is not None and time.perf_counter() - self._last_time >= self.seconds:
+            self.report(discovered, frontier)
+
+    def report(self, discovered: int, frontier: int, done: bool = False):
+        """Write a progress report.
+
+        Args:
+            discovered (int): Number of discovered macrostates.
+            frontier (int): Number of discovered macrostates not explored yet.
+            done (bool): Whether the exploration is finished.
+        """
+        now = time.perf_counter()
+        elapsed = now - self.start
+
+        line = {
+            'time': elapsed,
+            'states': discovered,
+            'explored': self.explored,
+            'frontier': frontier,
+            'edges': self.edges,
+            'states_per_second': self.explored / elapsed if elapsed > 0 else None,
+            'cache_sizes': {name: stats['size'] for name, stats in self.algorithm.cache_stats().items()},
+            'rss': resident_set_size(),
+            'done': done
+        }
+
+        if self.path is None:
+            print(json.dumps(line), file=sys.stderr, flush=True)
+        else:
+            with open(self.path, 'a') as f:
+                print(json.dumps(line), file=f)
+
+        self._last_time = now
+        self._last_explored = self.explored
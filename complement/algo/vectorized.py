@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Vectorised computation of images of macrostates.
+
+This module provides an engine computing the images of all the sets of a PBS
+macrostate for all the letters of the alphabet in a single batched operation
+with NumPy, instead of looking up successors letter by letter.
+
+The input automaton is stored as boolean arrays indexed by (letter, state, state),
+one for all the transitions and one for the accepting ones, together with their
+variants restricted by the state filter of the algorithm. Sets of states are
+boolean vectors, the images of a stack of them are computed by a boolean matrix
+product.
+
+NumPy is an optional dependency, it is only required by this engine.
+
+"""
+
+from typing import Any, Iterator, List
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from .base import ComplementationAlgorithm, States
+
+
+class NumpyEngine:
+    """Engine computing images of macrostates for all letters at once.
+
+    Attributes:
+        algorithm (`ComplementationAlgorithm`): The algorithm the engine works for,
+            its transition table, encoding and filters are used.
+        successors (`numpy.ndarray`): All transitions indexed by (letter, source,
+            destination).
+        marked (`numpy.ndarray`): Accepting transitions indexed the same way.
+        filtered (`numpy.ndarray`): `successors` restricted by the state filter.
+        filtered_marked (`numpy.ndarray`): `marked` restricted by the state filter.
+
+    """
+
+    def __init__(self, algorithm: ComplementationAlgorithm):
+        if np is None:
+            raise ImportError('The numpy engine requires NumPy')
+
+        self.algorithm = algorithm
+        self.encoding = algorithm.encoding
+
+        members = self.encoding.members
+        empty = self.encoding.empty
+
+        self.n = algorithm.input_automaton.num_states()
+        self.letters = algorithm.alphabet
+
+        shape = (len(self.letters), self.n, self.n)
+        self.successors = np.zeros(shape, dtype=bool)
+        self.marked = np.zeros(shape, dtype=bool)
+
+        for i, letter in enumerate(self.letters):
+            for s in range(self.n):
+                successors, marked = algorithm.transitions[s].get(letter, (empty, empty))
+                self.successors[i, s, list(members(successors))] = True
+                self.marked[i, s, list(members(marked))] = True
+
+        state_filter = algorithm.state_filter
+        if state_filter is None:
+            self.filtered = self.successors
+            self.filtered_marked = self.marked
+        else:
+            mask = np.array([[state_filter((s, d)) for d in range(self.n)] for s in range(self.n)], dtype=bool)
+            self.filtered = self.successors & mask
+            self.filtered_marked = self.marked & mask
+
+        # Nondeterministic successors of B are reported as the successor sets
+        # of single states, keep them encoded for each letter.
+        self.nondeterministic = self.filtered.sum(axis=2) > 1
+        self.state_images = [
+            [algorithm._state_successors(s, letter, state_filter)[0] for s in range(self.n)]
+            for letter in self.letters
+        ]
+
+    def images(self, P: States, B: States, S: Any) -> Iterator[tuple]:
+        """Get images of the sets of a macrostate for every letter.
+
+        Args:
+            P (`States`): Set P.
+            B (`States`): Set B.
+            S (`MetaStates`): Set S.
+
+        Yields:
+            `LetterImages`: The same as `PBS.letter_images`.
+
+        """
+        encoding = self.encoding
+        metastate_filter = self.algorithm.metastate_filter
+
+        # B and the components of the metastates of S, all restricted by the filter.
+        rows = [B] + [component for metastate in S for component in metastate]
+        vectors = np.stack([self._vector(row) for row in rows])
+
+        P_images = self._decode_all(self._vector(P) @ self.successors)
+        images = vectors @ self.filtered
+        marked_images = vectors @ self.filtered_marked
+
+        # Breakpoints gain the successors of their powersets by accepting edges.
+        breakpoints = images[:, 2::2, :] | marked_images[:, 1::2, :]
+        powersets = images[:, 1::2, :]
+        invalid = (powersets == breakpoints).all(axis=2).any(axis=1)
+
+        B_members = list(encoding.members(B))
+
+        for i, letter in enumerate(self.letters):
+            B_image, = self._decode_all(images[i, :1])
+            B_marked, = self._decode_all(marked_images[i, :1])
+            nondeterministic = {self.state_images[i][s] for s in B_members if self.nondeterministic[i, s]}
+
+            new_S = encoding.metastates(zip(self._decode_all(powersets[i]), self._decode_all(breakpoints[i])))
+            valid = not invalid[i] and metastate_filter(new_S)
+
+            yield letter, P_images[i], B_image, B_marked, nondeterministic, new_S, valid
+
+    def _vector(self, states: States) -> 'np.ndarray':
+        vector = np.zeros(self.n, dtype=bool)
+        vector[list(self.encoding.members(states))] = True
+
+        return vector
+
+    def _decode_all(self, vectors: 'np.ndarray') -> List[States]:
+        """Encode rows of boolean vectors as sets of states."""
+        if self.encoding.empty == 0:
+            packed = np.packbits(vectors, axis=-1, bitorder='little')
+            return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+
+        return [self.encoding.make(np.flatnonzero(row).tolist()) for row in vectors]
+
+
+ENGINES = {
+    'python': None,
+    'numpy': NumpyEngine
+}
+
+
+def get_engine(name: str, algorithm: ComplementationAlgorithm) -> Any:
+    """Create an engine computing images of macrostates by its name.
+
+    Args:
+        name (str): `python` for computing images letter by letter, or `numpy`.
+        algorithm (`ComplementationAlgorithm`): The algorithm the engine works for.
+
+    Returns:
+        The engine, or `None` for `python`.
+
+    """
+    if name not in ENGINES:
+        raise ValueError(f'Unknown engine: {name}')
+
+    if ENGINES[name] is None:
+        return None
+
+    return ENGINES[name](algorithm)
@@ -0,0 +1,53 @@
+"""Client of the complementation server.
+
+Sends automata to a running complementation server (see `complement.py
+--server`) and prints their complements. It does not load Spot, so it starts
+much faster than `complement.py` itself.
+"""
+
+import argparse
+import json
+import socket
+import sys
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Complement automata by a running PBS complementation server',
+           allow_abbrev=True)
+    parser.add_argument('socket', type=str,
+                        help='Unix socket of the server')
+    parser.add_argument('file', type=str, nargs='*',
+                        help='automata to process', default=['-'])
+    parser.add_argument('--trim', action='store_true',
+                        help='trim dead states in result')
+
+    args = parser.parse_args()
+
+    text = ''
+    for name in args.file:
+        if name == '-':
+            text += sys.stdin.read()
+        else:
+            with open(name) as f:
+                text += f.read()
+        text += '\n'
+
+    request = json.dumps({'trim': args.trim}) + '\n' + text
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(args.socket)
+        connection.sendall(request.encode())
+        connection.shutdown(socket.SHUT_WR)
+
+        while True:
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            sys.stdout.buffer.write(chunk)
+
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
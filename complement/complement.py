@@ -1,12 +1,277 @@
 import argparse
+import functools
+import json
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import spot
 
+from algo import dispatch
+from algo.parallel import ParallelPBS
 from algo.pbs import PBS
+from algo.portfolio import PICKS, Portfolio
+from algo.preprocess import LEVELS
+from result_cache import DEFAULT_MAX_SIZE, ResultCache, default_directory as result_cache_directory
+from server import DEFAULT_CACHE_SIZE as DEFAULT_SERVER_CACHE_SIZE, serve
 
 spot.setup()
 
 
+def parse_cache_sizes(sizes, disabled):
+    """Get size limits of the caches from the command line arguments.
+
+    Args:
+        sizes (list): Limits in the form `NAME=SIZE`, `NAME` can be `all`.
+        disabled (list): Names of caches to disable.
+
+    Returns:
+        dict: Size limits of the caches by their names.
+    """
+    limits = {}
+
+    for size in sizes:
+        name, _, value = size.partition('=')
+
+        if name != 'all' and name not in PBS.CACHES:
+            raise argparse.ArgumentTypeError(f'unknown cache {name}')
+        if not value.isdigit():
+            raise argparse.ArgumentTypeError(f'invalid size of cache {name}: {value}')
+
+        for cache in (PBS.CACHES if name == 'all' else [name]):
+            limits[cache] = int(value)
+
+    for name in disabled:
+        limits[name] = 0
+
+    return limits
+
+
+def choose_construction(aut, complement_args):
+    """Choose the construction complementing an automaton.
+
+    Args:
+        aut (spot.twa_graph): Input automaton.
+        complement_args (dict): Arguments for PBS, PBS is always used if
+            `dispatch` is `False`.
+
+    Returns:
+        tuple: Name of the construction, see `dispatch.CONSTRUCTIONS`, and the
+            automaton to complement by it, see `dispatch.choose_construction`.
+    """
+    if not aut.acc().is_buchi():
+        raise ValueError('Input automaton must be Buchi')
+
+    if not complement_args.get('dispatch', True):
+        return 'pbs', aut
+
+    return dispatch.choose_construction(aut)
+
+
+def complement_automaton(aut, complement_args, trim=False, result_cache=None, refresh=False):
+    """Complement a single automaton by the cheapest construction or by PBS.
+
+    The used construction is recorded in a comment of the resulting HOA.
+
+    Args:
+        aut (spot.twa_graph): Input automaton.
+        complement_args (dict): Arguments for PBS.
+        trim (bool, optional): Trim dead states in the result.
+        result_cache (ResultCache, optional): Persistent cache of results
+            consulted before the complementation.
+        refresh (bool, optional): Complement even if the result is cached and
+            replace the cached result.
+
+    Returns:
+        tuple: HOA of the complement and its statistics, see `algorithm_stats`.
+    """
+    # A profiled or measured run has to really run.
+    if result_cache is None or complement_args.get('profile') or complement_args.get('memory'):
+        return complement_uncached(aut, complement_args, trim)
+
+    # Arguments which do not change the result are not a part of the key,
+    # results of another version of Spot may differ.
+    key_args = {k: v for k, v in complement_args.items() if k not in ('cache', 'engine', 'workers', 'profile', 'progress', 'memory')}
+    key = result_cache.key(aut.to_str('hoa'), dict(key_args, trim=trim, spot=spot.version()))
+
+    entry = None if refresh else result_cache.get(key)
+    if entry is None:
+        output, stats = complement_uncached(aut, complement_args, trim)
+        result_cache.put(key, {'output': output, 'stats': stats})
+        return output, stats
+
+    # Statistics measured by the run which stored the result.
+    return entry['output'], dict(entry['stats'], cached=True)
+
+
+def complement_uncached(aut, complement_args, trim=False):
+    """Complement a single automaton, see `complement_automaton`.
+
+    Args:
+        aut (spot.twa_graph): Input automaton.
+        complement_args (dict): Arguments for PBS.
+        trim (bool, optional): Trim dead states in the result.
+
+    Returns:
+        tuple: HOA of the complement and its statistics, see `algorithm_stats`.
+    """
+    construction, prepared = choose_construction(aut, complement_args)
+    portfolio = complement_args.get('portfolio')
+
+    pbs_algorithm = None
+    description = None
+
+    if construction != 'pbs':
+        res = dispatch.complement(prepared, construction)
+    elif portfolio:
+        racing = Portfolio(aut, complement_args, portfolio['pick'], portfolio['budget'])
+        winner, res = racing.complement()
+
+        construction = 'portfolio'
+        description = f'{portfolio["pick"]} of {len(racing.report)}: {winner}'
+    elif complement_args.get('workers', 1) > 1:
+        pbs_algorithm = ParallelPBS(aut, complement_args)
+        res = pbs_algorithm.complement()
+    else:
+        pbs_algorithm = PBS(aut, complement_args)
+        res = pbs_algorithm.complement()
+
+    if trim:
+        res = spot.scc_filter_states(res, True)
+
+    output = dispatch.annotate(res.to_str(), construction, description)
+
+    return output, algorithm_stats(construction, pbs_algorithm)
+
+
+def algorithm_stats(construction, pbs_algorithm=None):
+    """Collect statistics of a finished complementation.
+
+    Args:
+        construction (str): Name of the used construction.
+        pbs_algorithm (PBS, optional): The algorithm after the complementation,
+            `None` if PBS was not used.
+
+    Returns:
+        dict: The construction, statistics of the caches, the report of
+            preprocessing and the profile and the memory report of PBS if
+            they were requested.
+    """
+    profiler = pbs_algorithm.profiler if pbs_algorithm else None
+    memory = pbs_algorithm.memory if pbs_algorithm else None
+
+    return {
+        'construction': construction,
+        'cache': pbs_algorithm.cache_stats() if pbs_algorithm else {},
+        'preprocess': pbs_algorithm.preprocess_report if pbs_algorithm else [],
+        'profile': profiler.report() if profiler else None,
+        'memory': memory.report() if memory else None
+    }
+
+
+def print_stats(stats, args):
+    """Print the statistics requested on the command line to stderr.
+
+    Args:
+        stats (dict): Statistics given by `algorithm_stats`.
+        args (argparse.Namespace): Parsed command line arguments.
+    """
+    # Nothing was measured for a result from the result cache.
+    if args.cache_stats:
+        print(json.dumps({'cached': True} if stats.get('cached') else stats['cache']), file=sys.stderr)
+    if args.preprocess_stats:
+        print(json.dumps({'cached': True} if stats.get('cached') else stats['preprocess']), file=sys.stderr)
+    for report, path in (('profile', args.profile), ('memory', args.memory_report)):
+        if path is None:
+            continue
+
+        line = dict(stats[report] or {}, construction=stats['construction'])
+        if path == '-':
+            print(json.dumps(line), file=sys.stderr)
+        else:
+            with open(path, 'a') as f:
+                print(json.dumps(line), file=f)
+
+
+def complement_hoa(hoa, complement_args, trim=False, result_cache=None, refresh=False):
+    """Complement an automaton given in HOA in a worker process.
+
+    Any failure is returned instead of raised, so that it does not affect
+    the other automata processed by the pool.
+
+    Args:
+        hoa (str): Input automaton in HOA.
+        complement_args (dict): Arguments for PBS.
+        trim (bool, optional): Trim dead states in the result.
+        result_cache (ResultCache, optional): Persistent cache of results.
+        refresh (bool, optional): Replace the cached result.
+
+    Returns:
+        tuple: HOA of the complement, its statistics and an error
+            message, either the first two or the last one are `None`.
+    """
+    try:
+        output, stats = complement_automaton(spot.automaton(hoa), complement_args, trim, result_cache, refresh)
+        return output, stats, None
+    except ValueError as e:
+        return None, None, f'There is a problem with the input automaton: {e}'
+    except Exception as e:
+        return None, None, f'Complementation failed: {type(e).__name__}: {e}'
+
+
+def complement_in_pool(worker, automata, jobs):
+    """Complement automata in a pool of worker processes.
+
+    The workers run ahead of the consumer by at most twice their number of
+    automata. A worker killed by a signal, for example for lack of memory,
+    breaks the whole pool together with the tasks of the other workers. The
+    pool is then replaced and each of the lost automata is run again alone,
+    so that only the automaton killing its worker fails.
+
+    Args:
+        worker (callable): Function complementing an automaton in HOA, see
+            `complement_hoa`.
+        automata (iterable of str): Input automata in HOA.
+        jobs (int): Number of worker processes.
+
+    Yields:
+        tuple: Results of `worker` in the input order.
+    """
+    executor = ProcessPoolExecutor(jobs)
+    pending = deque()
+
+    def result(hoa, future):
+        nonlocal executor
+
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            pass
+
+        executor.shutdown(wait=False, cancel_futures=True)
+        executor = ProcessPoolExecutor(jobs)
+        for i, (other, _) in enumerate(pending):
+            pending[i] = (other, executor.submit(worker, other))
+
+        with ProcessPoolExecutor(1) as alone:
+            try:
+                return alone.submit(worker, hoa).result()
+            except BrokenProcessPool:
+                return None, None, 'Complementation failed: the worker process died'
+
+    try:
+        for hoa in automata:
+            pending.append((hoa, executor.submit(worker, hoa)))
+            if len(pending) >= 2 * jobs:
+                yield result(*pending.popleft())
+
+        while pending:
+            yield result(*pending.popleft())
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def main():
     parser = argparse.ArgumentParser \
       (description='Apply PBS complementation construction to an input automaton',
@@ -15,6 +280,29 @@ def main():
                         help='automata to process', default='-')
     parser.add_argument('--trim', action='store_true',
                         help='trim dead states in result')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='complement the input automata in N worker '
+                        'processes, results are still printed in the input '
+                        'order (1)', metavar='N')
+    parser.add_argument('-w', '--workers', type=int, default=1, metavar='N',
+                        help='explore the complement of each automaton in N '
+                        'worker processes (1)')
+    parser.add_argument('--stream', action='store_true',
+                        help='write each state of the result as soon as it is '
+                        'explored instead of building the whole result first')
+    parser.add_argument('--names', type=str, choices=['keep', 'drop'], default='keep',
+                        help='keep or drop names of the states of the result '
+                        'when streaming (keep)')
+    parser.add_argument('--names_file', type=str, metavar='FILE',
+                        help='when streaming, write the names of the states to '
+                        'FILE instead of the result')
+    parser.add_argument('--server', type=str, metavar='SOCKET',
+                        help='instead of processing files, serve complementation '
+                        'requests of client.py on the Unix socket SOCKET')
+    parser.add_argument('--server_cache', type=int, metavar='N',
+                        default=DEFAULT_SERVER_CACHE_SIZE,
+                        help='remember complements of at most N automata in '
+                        'the server, 0 to disable (%(default)s)')
 
     # Optimization tuning.
     parser.add_argument('-nscc', '--no_use_scc', action='store_true',
@@ -25,28 +313,239 @@ def main():
                         help='do not restrict states that can move from B to S '
                         'to those that are successors after an accepting or '
                         'nondeterministic transition')
+    parser.add_argument('-sub', '--use_subsumption', action='store_true',
+                        help='keep only metastates of S not subsumed by another '
+                        'metastate with the same powerset and a larger breakpoint')
+    parser.add_argument('--B_to_S_limit', type=int, metavar='N',
+                        help='generate at most N combinations of states leaving '
+                        'B for S per successor; the complement may then be '
+                        'incomplete')
+    parser.add_argument('--B_to_S_order', type=str, choices=PBS.B_TO_S_ORDERS,
+                        default='smallest',
+                        help='generate combinations of states leaving B for S '
+                        'from the smallest or from the largest ones')
+
+    # Choice of the construction.
+    parser.add_argument('--force_pbs', action='store_true',
+                        help='complement by PBS even if the input is deterministic, '
+                        'inherently weak or semi-deterministic')
+
+    # Persistent cache of results.
+    parser.add_argument('--result_cache', type=str, nargs='?', metavar='DIR',
+                        const=result_cache_directory(),
+                        help='keep results in a persistent cache in DIR, or in '
+                        '%(const)s, and answer automata cached by earlier runs '
+                        'from it')
+    parser.add_argument('--result_cache_size', type=int, metavar='BYTES',
+                        default=DEFAULT_MAX_SIZE,
+                        help='maximal total size of the cached results, the least '
+                        'recently used ones are removed (%(default)s)')
+    parser.add_argument('--refresh_result_cache', action='store_true',
+                        help='complement even cached automata and replace their '
+                        'cached results')
+
+    # Racing of constructions.
+    parser.add_argument('--portfolio', action='store_true',
+                        help='complement inputs needing PBS by several PBS variants, '
+                        'Spot and NCSB at once in separate processes')
+    parser.add_argument('--portfolio_pick', type=str, choices=PICKS, default='first',
+                        help='take the first finished result or the smallest one '
+                        'finished within the budget (first)')
+    parser.add_argument('--budget', type=float, metavar='SECONDS',
+                        help='time budget of the portfolio, unlimited by default')
+
+    # Preprocessing of the input.
+    parser.add_argument('-p', '--preprocess', type=str, choices=LEVELS, default='none',
+                        help='reduce the input automaton before complementation: '
+                        'trim useless states, then also reduce by direct '
+                        'simulation of Spot, then also '
+                        'quotient by delayed simulation, then also iterate '
+                        'simulation and cosimulation of Spot (none)')
+    parser.add_argument('--preprocess_stats', action='store_true',
+                        help='print sizes and times of the preprocessing stages '
+                        'to stderr')
+
+    # Representation tuning.
+    parser.add_argument('--bitsets', action='store_true',
+                        help='encode sets of states in macrostates as bitmasks')
+    parser.add_argument('--engine', type=str, choices=['python', 'numpy'], default='python',
+                        help='compute images of macrostates letter by letter '
+                        '(python) or for all letters at once (numpy, requires '
+                        'NumPy)')
+
+    # Cache tuning.
+    parser.add_argument('--cache_size', type=str, action='append', default=[],
+                        metavar='NAME=SIZE',
+                        help='keep at most SIZE least recently used entries in '
+                        'the cache NAME (or in all caches), can be repeated; '
+                        f'caches are {", ".join(PBS.CACHES)}')
+    parser.add_argument('--no_cache', type=str, action='append', default=[],
+                        choices=PBS.CACHES, metavar='NAME',
+                        help='disable the cache NAME, can be repeated')
+    parser.add_argument('--profile', type=str, nargs='?', const='-', metavar='FILE',
+                        help='measure time and calls of the phases of PBS and '
+                        'write them as JSON lines to FILE, or to stderr')
+    parser.add_argument('--progress', action='store_true',
+                        help='report the progress of the exploration as JSON lines')
+    parser.add_argument('--progress_seconds', type=float, metavar='S', default=10.0,
+                        help='report progress every S seconds (10)')
+    parser.add_argument('--progress_states', type=int, metavar='N',
+                        help='report progress also every N explored macrostates')
+    parser.add_argument('--progress_file', type=str, metavar='FILE',
+                        help='append the progress reports to FILE instead of stderr')
+    parser.add_argument('--memory_report', type=str, nargs='?', const='-', metavar='FILE',
+                        help='sample the memory used by the structures of PBS '
+                        'and write the peaks and the distribution of the sizes '
+                        'of P, B and S as JSON lines to FILE, or to stderr')
+    parser.add_argument('--memory_every', type=int, metavar='N', default=1000,
+                        help='sample the memory every N explored macrostates (1000)')
+    parser.add_argument('--cache_stats', action='store_true',
+                        help='print hits, misses and evictions of the caches '
+                        'to stderr')
 
     args = parser.parse_args()
 
+    try:
+        cache_sizes = parse_cache_sizes(args.cache_size, args.no_cache)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
     complement_args = {
         'optimizations': {
             'use_scc': not args.no_use_scc,
             'use_hopeful': not args.no_use_hopeful,
-            'restrict_B_to_S': not args.no_restrict_B_to_S
-        }
+            'restrict_B_to_S': not args.no_restrict_B_to_S,
+            'use_subsumption': args.use_subsumption
+        },
+        'encoding': 'bitsets' if args.bitsets else 'sets',
+        'engine': args.engine,
+        'preprocess': args.preprocess,
+        'dispatch': not args.force_pbs,
+        'portfolio': {'pick': args.portfolio_pick, 'budget': args.budget} if args.portfolio else None,
+        'B_to_S_limit': args.B_to_S_limit,
+        'B_to_S_order': args.B_to_S_order,
+        'cache': cache_sizes,
+        'workers': args.workers,
+        'profile': args.profile is not None,
+        'progress': {
+            'seconds': args.progress_seconds,
+            'states': args.progress_states,
+            'path': args.progress_file
+        } if args.progress else None,
+        'memory': {'states': args.memory_every} if args.memory_report is not None else None
     }
 
+    if args.jobs < 1:
+        parser.error('the number of jobs must be positive')
+
+    if args.workers < 1:
+        parser.error('the number of workers must be positive')
+
+    if args.B_to_S_limit is not None and args.B_to_S_limit < 1:
+        parser.error('the limit of combinations leaving B for S must be positive')
+
+    if args.workers > 1 and args.jobs > 1:
+        parser.error('--workers cannot be combined with --jobs')
+
+    # The phases run in the workers, which are not profiled.
+    if args.workers > 1 and args.profile is not None:
+        parser.error('--profile cannot be combined with --workers')
+
+    if args.stream and (args.trim or args.jobs > 1 or args.workers > 1):
+        parser.error('--stream cannot be combined with --trim, --jobs or --workers')
+
+    if args.portfolio and (args.stream or args.jobs > 1 or args.workers > 1):
+        parser.error('--portfolio cannot be combined with --stream, --jobs or --workers')
+
+    if args.budget is not None and args.budget <= 0:
+        parser.error('the time budget must be positive')
+
+    if args.progress_seconds <= 0 or args.progress_states is not None and args.progress_states < 1:
+        parser.error('the period of progress reports must be positive')
+
+    if args.memory_every < 1:
+        parser.error('the period of memory samples must be positive')
+
+    # Reports of all the automata of this run are appended.
+    for path in (args.profile, args.memory_report):
+        if path is not None and path != '-':
+            open(path, 'w').close()
+
+    if args.result_cache_size < 1:
+        parser.error('the size of the result cache must be positive')
+
+    if args.server_cache < 0:
+        parser.error('the size of the server cache must not be negative')
+
+    # Streamed complements are too large to be cached.
+    result_cache = None
+    if args.result_cache is not None and not args.stream:
+        result_cache = ResultCache(args.result_cache, args.result_cache_size)
+
+    if args.stream:
+        names_stream = open(args.names_file, 'w') if args.names_file else None
+        names = 'external' if names_stream else args.names
+
+        for aut in spot.automata(*args.file):
+            try:
+                construction, prepared = choose_construction(aut, complement_args)
+
+                if construction != 'pbs':
+                    # Cheap constructions do not need streaming.
+                    res = dispatch.complement(prepared, construction)
+                    print(dispatch.annotate(res.to_str(), construction))
+                    print_stats(algorithm_stats(construction), args)
+                    continue
+
+                pbs_algorithm = PBS(aut, complement_args)
+                pbs_algorithm.complement_to_hoa(sys.stdout, names, names_stream, dispatch.comment(construction))
+
+                print_stats(algorithm_stats(construction, pbs_algorithm), args)
+            except ValueError as e:
+                print(f'There is a problem with the input automaton: {e}')
+            except RuntimeError as e:
+                print(f'Complementation failed: {type(e).__name__}: {e}')
+
+        if names_stream:
+            names_stream.close()
+
+        return
+
+    if args.server:
+        serve(args.server, functools.partial(complement_automaton, complement_args=complement_args,
+                                             result_cache=result_cache, refresh=args.refresh_result_cache),
+              args.server_cache)
+        return
+
+    if args.jobs > 1:
+        worker = functools.partial(complement_hoa, complement_args=complement_args, trim=args.trim,
+                                   result_cache=result_cache, refresh=args.refresh_result_cache)
+        automata = (aut.to_str('hoa') for aut in spot.automata(*args.file))
+
+        for output, stats, error in complement_in_pool(worker, automata, args.jobs):
+            if error is not None:
+                print(error)
+                continue
+
+            print_stats(stats, args)
+
+            print(output)
+
+        return
+
     for aut in spot.automata(*args.file):
         try:
-            pbs_algorithm = PBS(aut, complement_args)
-            res = pbs_algorithm.complement()
+            output, stats = complement_automaton(aut, complement_args, args.trim,
+                                                 result_cache, args.refresh_result_cache)
 
-            if args.trim:
-                res = spot.scc_filter_states(res, True)
+            print_stats(stats, args)
 
-            print(res.to_str())
+            print(output)
         except ValueError as e:
             print(f'There is a problem with the input automaton: {e}')
+        except RuntimeError as e:
+            # For example no construction of the portfolio finished in time.
+            print(f'Complementation failed: {type(e).__name__}: {e}')
 
 
 if __name__ == "__main__":
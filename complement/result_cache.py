@@ -0,0 +1,187 @@
+"""Persistent cache of complementation results.
+
+Complements are stored on disk in a directory, keyed by the SHA-256 hash of
+the input automaton in HOA as printed by Spot together with the arguments
+influencing the result and `CACHE_VERSION`, so that the same automaton
+complemented again in a later run is answered without running the
+construction, but results of older versions of the constructions are not.
+
+Every entry is a JSON file with the HOA of the complement and its statistics.
+Entries are written to a temporary file first and then atomically renamed, so
+readers never see a partially written entry. Reading an entry refreshes its
+modification time. Entries are stored under an exclusive lock of the
+directory, so that several processes can share the cache, and the total size
+of the entries is kept in an index file. Only when it exceeds the limit, the
+directory is scanned and the least recently used entries are removed until the
+total size falls below `EVICT_TO` of the limit.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+
+# Default limit of the total size of the entries in bytes.
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Version of the results, increase it whenever a change of the constructions or
+# of the entries makes the cached results invalid.
+CACHE_VERSION = 1
+
+# Fraction of the limit the total size of the entries is reduced to by eviction.
+EVICT_TO = 0.9
+
+
+def default_directory():
+    """Get the default directory of the cache.
+
+    Returns:
+        str: `pbs` in `$XDG_CACHE_HOME`, or in `~/.cache` if it is not set.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'pbs')
+
+
+class ResultCache:
+    """Cache of complementation results in a directory.
+
+    Attributes:
+        directory (str): Directory with the entries.
+        max_size (int): Maximal total size of the entries in bytes.
+
+    """
+
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        if max_size < 1:
+            raise ValueError('Size of the result cache must be positive')
+
+        self.directory = directory
+        self.max_size = max_size
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(hoa, args):
+        """Compute the key of a result.
+
+        Args:
+            hoa (str): Input automaton in HOA as printed by Spot.
+            args (dict): Arguments influencing the result, serializable to JSON.
+
+        Returns:
+            str: Hexadecimal SHA-256 hash of the version of the results, the
+                automaton and the arguments.
+        """
+        digest = hashlib.sha256()
+        digest.update(f'pbs-results-{CACHE_VERSION}'.encode())
+        digest.update(b'\0')
+        digest.update(hoa.encode())
+        digest.update(b'\0')
+        digest.update(json.dumps(args, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Get a cached result and mark it as recently used.
+
+        Args:
+            key (str): Key given by `key`.
+
+        Returns:
+            dict: The stored entry, or `None` if there is none.
+        """
+        path = self._path(key)
+
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, json.JSONDecodeError):
+            # Evicted meanwhile or written by an incompatible version.
+            return None
+
+        return entry
+
+    def put(self, key, entry):
+        """Store a result and evict the least recently used ones over the limit.
+
+        Args:
+            key (str): Key given by `key`.
+            entry (dict): The result, serializable to JSON.
+        """
+        path = self._path(key)
+
+        fd, temporary = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            size = os.path.getsize(temporary)
+
+            with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+
+                try:
+                    replaced = os.path.getsize(path)
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(temporary, path)
+
+                total = self._read_total()
+                if total is None:
+                    total = self._evict()
+                else:
+                    total += size - replaced
+                    if total > self.max_size:
+                        total = self._evict()
+                self._write_total(total)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def _read_total(self):
+        try:
+            with open(os.path.join(self.directory, '.size')) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            # A new directory or one of an older version.
+            return None
+
+    def _write_total(self, total):
+        with open(os.path.join(self.directory, '.size'), 'w') as f:
+            f.write(str(total))
+
+    def _evict(self):
+        """Scan the entries and remove the least recently used ones over the limit.
+
+        Has to be called under the lock of the directory.
+
+        Returns:
+            int: Total size of the remaining entries in bytes.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                info = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime, info.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        if total > self.max_size:
+            for _, size, name in sorted(entries):
+                if total <= self.max_size * EVICT_TO:
+                    break
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+        return total
@@ -0,0 +1,125 @@
+"""Complementation server.
+
+Keeps a single process with Spot loaded running and complements automata sent
+over a Unix socket, so that tool chains calling the tool for many small automata
+do not pay for the start-up of Python and Spot on every call. Complements of
+automata seen before are answered from a cache of results.
+
+A request is a single line with a JSON object of options (currently only
+`trim`) followed by automata in HOA. The client then shuts down its side of the
+connection for writing and the server answers with the complements in the input
+order and closes the connection, see `client.py`.
+"""
+
+import json
+import os
+import socketserver
+import stat
+
+import spot
+
+from algo.cache import LRUCache, MISSING
+
+# Default maximal number of cached results.
+DEFAULT_CACHE_SIZE = 1024
+
+
+class ComplementationHandler(socketserver.StreamRequestHandler):
+    """Handler of a single request to the complementation server."""
+
+    def handle(self):
+        header = self.rfile.readline().decode()
+        text = self.rfile.read().decode()
+
+        try:
+            options = json.loads(header) if header.strip() else {}
+        except json.JSONDecodeError as e:
+            self.wfile.write(f'Invalid request options: {e}\n'.encode())
+            return
+
+        for response in self.server.complement_all(text, bool(options.get('trim', False))):
+            self.wfile.write(f'{response}\n'.encode())
+
+
+class ComplementationServer(socketserver.UnixStreamServer):
+    """Server complementing automata sent over a Unix socket.
+
+    Requests are handled one after another, Spot is not used from several
+    threads at once.
+
+    Attributes:
+        complement (callable): Function complementing a single automaton, it
+            takes the automaton and the `trim` option and returns the HOA of the
+            complement and statistics of the caches.
+        results (`LRUCache`): Complements of the automata seen before.
+
+    """
+
+    def __init__(self, path, complement, cache_size=DEFAULT_CACHE_SIZE):
+        super().__init__(path, ComplementationHandler)
+
+        self.complement = complement
+        self.results = LRUCache('results', cache_size)
+
+    def complement_all(self, text, trim=False):
+        """Complement all the automata in a request.
+
+        Args:
+            text (str): Automata in HOA.
+            trim (bool, optional): Trim dead states in the results.
+
+        Yields:
+            str: HOA of the complements or error messages in the input order.
+        """
+        if not text.strip():
+            return
+
+        # Spot runs a source ending with '|' as a shell command, a trailing
+        # newline makes it always parse the text itself.
+        try:
+            automata = list(spot.automata(f'{text}\n'))
+        except Exception as e:
+            yield f'There is a problem with the input automaton: {e}'
+            return
+
+        for aut in automata:
+            key = (aut.to_str('hoa'), trim)
+
+            output = self.results.get(key)
+            if output is MISSING:
+                try:
+                    output, _ = self.complement(aut, trim=trim)
+                except ValueError as e:
+                    output = f'There is a problem with the input automaton: {e}'
+                except Exception as e:
+                    # The failure may not repeat, for example an exhausted
+                    # budget, so it is not cached.
+                    yield f'Complementation failed: {type(e).__name__}: {e}'
+                    continue
+
+                self.results[key] = output
+
+            yield output
+
+
+def serve(path, complement, cache_size=DEFAULT_CACHE_SIZE):
+    """Run the complementation server until interrupted.
+
+    Args:
+        path (str): Path of the Unix socket, a stale socket is replaced.
+        complement (callable): See `ComplementationServer`.
+        cache_size (int, optional): Maximal number of cached results, `None`
+            for unbounded, defaults to `DEFAULT_CACHE_SIZE`.
+    """
+    if os.path.exists(path):
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            raise ValueError(f'{path} exists and is not a socket')
+        os.unlink(path)
+
+    with ComplementationServer(path, complement, cache_size) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
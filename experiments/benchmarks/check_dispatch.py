@@ -0,0 +1,87 @@
+"""Check of the constructions chosen by the dispatch of the complementation.
+
+Translates LTL formulas to Buchi automata, complements each of them by the
+construction chosen by `algo.dispatch` and checks that the result is
+equivalent to the translation of the negated formula. The default formulas
+cover all the constructions, including inherently weak automata whose
+languages are not obligations, such as FG b, which have to avoid WDBA
+minimization.
+
+Run for example as
+
+    python benchmarks/check_dispatch.py 'FG b' 'G(a -> F b)'
+
+from the `experiments` directory.
+"""
+
+import argparse
+import sys
+
+import spot
+
+import common  # noqa: F401
+from algo import dispatch
+from algo.pbs import PBS
+
+FORMULAS = [
+    'G a',
+    'a U b',
+    'F a & G b',
+    'FG b',
+    'F(a & XG b)',
+    'GF a',
+    'GF a -> GF b',
+    'FG a | GF b'
+]
+
+
+def complement(aut):
+    '''Complement an automaton by the construction chosen by dispatch.
+
+    Args:
+        aut (spot.twa_graph): Buchi automaton.
+
+    Returns:
+        tuple: The chosen construction and the complement.
+    '''
+    construction, prepared = dispatch.choose_construction(aut)
+    if construction == 'pbs':
+        res = PBS(aut, {}).complement()
+    else:
+        res = dispatch.complement(prepared, construction)
+
+    # PBS builds its output on its own BDD dictionary, the products of Spot
+    # need automata sharing one.
+    return construction, spot.automaton(res.to_str('hoa'))
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Check complements of the constructions chosen by dispatch',
+           allow_abbrev=True)
+    parser.add_argument('formulas', type=str, nargs='*', default=FORMULAS,
+                        help='LTL formulas to check (a default set covering '
+                        'all the constructions)')
+
+    args = parser.parse_args()
+
+    failed = 0
+    for formula in args.formulas:
+        f = spot.formula(formula)
+        aut = spot.translate(f, 'Buchi', 'small')
+        construction, res = complement(aut)
+        negation = spot.translate(spot.formula.Not(f), 'Buchi')
+
+        equivalent = spot.are_equivalent(res, negation)
+        if not equivalent:
+            failed += 1
+        print(f'{formula}: {construction}, '
+              f'{"correct" if equivalent else "WRONG COMPLEMENT"}')
+
+    print(f'{len(args.formulas) - failed} of {len(args.formulas)} complements correct')
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
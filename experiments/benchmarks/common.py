@@ -0,0 +1,144 @@
+"""Shared helpers for the PBS benchmarks.
+
+Makes the `complement` sources and the experiment helpers importable from the
+benchmark scripts and provides basic measurements of a single complementation.
+"""
+
+import multiprocessing
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+from queue import Empty
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', '..', 'complement'))
+
+from algo.pbs import PBS  # noqa: E402
+from formula2aut import AutomataGenerator  # noqa: E402
+
+# Seconds between the checks of an isolated run.
+POLL = 0.1
+
+
+def random_automata(count, ap_count=2, min_states=2, max_states=7,
+                    deterministic=False, seed=0):
+    '''Generate seeded random Buchi automata for benchmarking.
+
+    Args:
+        Check `AutomataGenerator.generate`.
+        seed (int, optional): Seed for randaut (defaults to 0).
+
+    Returns:
+        list of spot.twa_graph: The generated automata.
+    '''
+    generator = AutomataGenerator()
+
+    return list(generator.automata(count, ap_count, min_states, max_states,
+                                   deterministic=deterministic, seed=seed,
+                                   buchi=True))
+
+
+def run_pbs(aut, args, trace_memory=False):
+    '''Complement an automaton by PBS and measure the run.
+
+    Args:
+        aut (spot.twa_graph): Input automaton.
+        args (dict): Arguments for `PBS`.
+        trace_memory (bool, optional): Measure the peak of memory allocated
+            by Python during the run with tracemalloc (slows the run down,
+            defaults to False).
+
+    Returns:
+        dict: Wall time in seconds, number of output states and edges and, if
+            requested, the peak of traced memory in bytes.
+    '''
+    if trace_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    res = PBS(aut, args).complement()
+    elapsed = time.perf_counter() - start
+
+    result = {
+        'time': elapsed,
+        'states': res.num_states(),
+        'edges': res.num_edges()
+    }
+
+    if trace_memory:
+        result['memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return result
+
+
+def _isolated_worker(hoa, args, results, memory_limit=None):
+    import spot
+
+    if memory_limit is not None:
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+    try:
+        result = run_pbs(spot.automaton(hoa), args)
+        # Kilobytes on Linux.
+        result['rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        results.put(result)
+    except Exception as e:
+        results.put({'error': f'{type(e).__name__}: {e}'})
+
+
+def run_pbs_isolated(aut, args, timeout=None, memory_limit=None):
+    '''Complement an automaton by PBS in a fresh process and measure the run.
+
+    The process is started from scratch, so that its peak resident set size
+    is not affected by the earlier runs.
+
+    Args:
+        aut (spot.twa_graph): Input automaton.
+        args (dict): Arguments for `PBS`.
+        timeout (float, optional): Time limit of the run in seconds.
+        memory_limit (int, optional): Limit of the address space of the
+            process in bytes, exceeding it fails the run.
+
+    Returns:
+        dict: Measurements of `run_pbs` and the peak resident set size of the
+            process in bytes (`rss`), or an `error` message if the run failed,
+            timed out or the process died (`died: <exit code>`).
+    '''
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_isolated_worker,
+                              args=(aut.to_str('hoa'), args, results, memory_limit))
+    process.start()
+
+    deadline = None if timeout is None else time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                result = results.get(timeout=POLL)
+                break
+            except Empty:
+                pass
+
+            if not process.is_alive():
+                # The result may have been sent just before the process exited.
+                try:
+                    result = results.get(timeout=POLL)
+                except Empty:
+                    result = {'error': f'died: {process.exitcode}'}
+                break
+
+            if deadline is not None and time.monotonic() >= deadline:
+                result = {'error': 'timeout'}
+                break
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+    return result
@@ -0,0 +1,86 @@
+"""Benchmark of the encodings of macrostates.
+
+Complements seeded random automata by PBS once with macrostates made of
+frozensets and once with macrostates made of bitmasks and compares the time
+and the peak of memory allocated by Python for both encodings.
+
+Run for example as
+
+    python benchmarks/encoding.py -n 50 -ap 3 -q 6 10 -o encoding.jsonl
+
+from the `experiments` directory.
+"""
+
+import argparse
+import json
+import sys
+
+from common import random_automata, run_pbs
+
+ENCODINGS = ['sets', 'bitsets']
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Compare frozenset and bitset encodings of PBS macrostates',
+           allow_abbrev=True)
+    parser.add_argument('-n', '--count', type=int,
+                        help='number of random automata (20)', default=20)
+    parser.add_argument('-ap', '--ap_count', type=int,
+                        help='number of atomic propositions (2)', default=2)
+    parser.add_argument('-q', '--states', type=int, nargs=2,
+                        help='number of states between the two values (4 8)',
+                        default=[4, 8])
+    parser.add_argument('-s', '--seed', type=int,
+                        help='seed for randaut (0)', default=0)
+    parser.add_argument('-o', '--output', type=str,
+                        help='file for the per-automaton results in JSON lines')
+
+    args = parser.parse_args()
+
+    automata = random_automata(args.count, args.ap_count, args.states[0],
+                               args.states[1], seed=args.seed)
+
+    output = open(args.output, 'w') if args.output else None
+    totals = {encoding: {'time': 0.0, 'memory': 0} for encoding in ENCODINGS}
+
+    for i, aut in enumerate(automata):
+        record = {'automaton': i, 'input_states': aut.num_states()}
+
+        for encoding in ENCODINGS:
+            # Time and memory are measured in separate runs, tracemalloc
+            # would distort the time.
+            timed = run_pbs(aut, {'encoding': encoding})
+            traced = run_pbs(aut, {'encoding': encoding}, trace_memory=True)
+
+            record[encoding] = {
+                'time': timed['time'],
+                'memory': traced['memory'],
+                'states': timed['states']
+            }
+
+            totals[encoding]['time'] += timed['time']
+            totals[encoding]['memory'] += traced['memory']
+
+        if record['sets']['states'] != record['bitsets']['states']:
+            print(f'automaton {i}: encodings differ in the number of states',
+                  file=sys.stderr)
+
+        if output:
+            print(json.dumps(record), file=output)
+
+    if output:
+        output.close()
+
+    print(f'{len(automata)} automata')
+    for encoding in ENCODINGS:
+        print(f'{encoding:>8}: {totals[encoding]["time"]:.3f} s, '
+              f'{totals[encoding]["memory"] / 2**20:.2f} MiB peak in total')
+
+    if totals['bitsets']['time'] and totals['bitsets']['memory']:
+        print(f'speed-up {totals["sets"]["time"] / totals["bitsets"]["time"]:.2f}x, '
+              f'memory ratio {totals["sets"]["memory"] / totals["bitsets"]["memory"]:.2f}x')
+
+
+if __name__ == "__main__":
+    main()
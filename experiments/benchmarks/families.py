@@ -0,0 +1,140 @@
+"""Parametric families of Buchi automata hard to complement.
+
+Random automata rarely show the worst-case blow-up of the complementation, the
+families here grow it with their parameter:
+
+- `michel` gives automata in the style of Michel's family with n + 1 states over
+  n + 1 letters, the complements of the original family need at least n! states,
+- `nondeterministic_scc` gives a single accepting SCC of n states in which every
+  state has two successors under every letter,
+- `many_aps` gives a small automaton over n atomic propositions whose labels
+  induce an alphabet of 2^n classes.
+
+Letters of `michel` and `nondeterministic_scc` are encoded by the valuations of
+as few atomic propositions as needed.
+"""
+
+import spot
+
+
+def _letters(count):
+    '''Encode letters as HOA labels over as few atomic propositions as needed.
+
+    Args:
+        count (int): Number of letters.
+
+    Returns:
+        tuple: Number of atomic propositions and the labels of the letters.
+    '''
+    ap_count = max(1, (count - 1).bit_length())
+    labels = ['&'.join(str(bit) if letter >> bit & 1 else f'!{bit}'
+                       for bit in range(ap_count))
+              for letter in range(count)]
+
+    return ap_count, labels
+
+
+def _automaton(name, states, ap_count, edges):
+    '''Build an automaton with initial state 0 from its edges.
+
+    Args:
+        name (str): Name of the automaton.
+        states (int): Number of states.
+        ap_count (int): Number of atomic propositions, named p0, p1, ...
+        edges (list of tuple): Sources, labels in HOA, destinations and
+            acceptance of the edges.
+
+    Returns:
+        spot.twa_graph: The automaton.
+    '''
+    body = {s: [] for s in range(states)}
+    for src, label, dst, accepting in edges:
+        body[src].append(f'[{label}] {dst}' + (' {0}' if accepting else ''))
+
+    lines = ['HOA: v1', f'name: "{name}"', f'States: {states}', 'Start: 0',
+             f'AP: {ap_count} ' + ' '.join(f'"p{i}"' for i in range(ap_count)),
+             'acc-name: Buchi', 'Acceptance: 1 Inf(0)', '--BODY--']
+    for s in range(states):
+        lines.append(f'State: {s}')
+        lines.extend(body[s])
+    lines.append('--END--')
+
+    return spot.automaton('\n'.join(lines) + '\n')
+
+
+def michel(n):
+    '''Automaton in the style of Michel's family.
+
+    Letters are 1, ..., n and #. The initial state 0 waits on any letter and
+    guesses a letter i to move to state i, which reads the letters 1, ..., n
+    other than i and returns to state 0 by an accepting edge on #.
+
+    Args:
+        n (int): Number of letters other than #.
+
+    Returns:
+        spot.twa_graph: The automaton with n + 1 states.
+    '''
+    ap_count, labels = _letters(n + 1)
+    sharp = labels[0]
+
+    edges = [(0, label, 0, False) for label in labels]
+    for i in range(1, n + 1):
+        edges.append((0, labels[i], i, False))
+        edges.extend((i, labels[j], i, False) for j in range(1, n + 1) if j != i)
+        edges.append((i, sharp, 0, True))
+
+    return _automaton(f'michel {n}', n + 1, ap_count, edges)
+
+
+def nondeterministic_scc(n, letters=2):
+    '''Single accepting SCC with two successors of every state under every letter.
+
+    Under letter l, state i goes to i + 1 and to (l + 2) * i, both modulo n.
+    The edges to state 0 under the first letter are accepting.
+
+    Args:
+        n (int): Number of states.
+        letters (int, optional): Number of letters (defaults to 2).
+
+    Returns:
+        spot.twa_graph: The automaton.
+    '''
+    ap_count, labels = _letters(letters)
+
+    edges = []
+    for i in range(n):
+        for l, label in enumerate(labels):
+            for dst in sorted({(i + 1) % n, (l + 2) * i % n}):
+                edges.append((i, label, dst, l == 0 and dst == 0))
+
+    return _automaton(f'nondeterministic scc {n}', n, ap_count, edges)
+
+
+def many_aps(n):
+    '''Small nondeterministic automaton over many atomic propositions.
+
+    State 0 waits on any letter and moves to state 1 on any p_i. State 1
+    stays on any !p_i by an accepting edge and returns to state 0 on
+    p_i & p_(i+1).
+
+    Args:
+        n (int): Number of atomic propositions.
+
+    Returns:
+        spot.twa_graph: The automaton with 2 states.
+    '''
+    edges = [(0, 't', 0, False)]
+    for i in range(n):
+        edges.append((0, str(i), 1, False))
+        edges.append((1, f'!{i}', 1, True))
+        edges.append((1, f'{i}&{(i + 1) % n}', 0, False))
+
+    return _automaton(f'many aps {n}', 2, n, edges)
+
+
+FAMILIES = {
+    'michel': michel,
+    'nondeterministic_scc': nondeterministic_scc,
+    'many_aps': many_aps
+}
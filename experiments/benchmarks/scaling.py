@@ -0,0 +1,162 @@
+"""Scaling of PBS on parametric hard families.
+
+Complements automata of a family from `families.py` with a growing parameter,
+each in a fresh process, until a run exceeds the time or memory ceiling or the
+maximal parameter is reached. Then fits a polynomial a * n^b and an exponential
+a * c^n growth curve to the time, the peak resident set size and the number of
+output states by least squares on their logarithms, and reports the better of
+them for each, so that the asymptotic effect of an optimization can be seen.
+
+Run for example as
+
+    python benchmarks/scaling.py michel --start 1 --max 8 -t 60 -o michel.jsonl
+
+from the `experiments` directory.
+"""
+
+import argparse
+import json
+import math
+import sys
+
+from common import run_pbs_isolated
+from families import FAMILIES
+
+METRICS = ['time', 'rss', 'states']
+
+
+def _linear_fit(xs, ys):
+    '''Fit y = k * x + q by least squares.
+
+    Returns:
+        tuple: Slope k, intercept q and the coefficient of determination.
+    '''
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    syy = sum((y - mean_y) ** 2 for y in ys)
+
+    k = sxy / sxx if sxx else 0.0
+    q = mean_y - k * mean_x
+    r2 = sxy * sxy / (sxx * syy) if sxx and syy else 1.0
+
+    return k, q, r2
+
+
+def fit_growth(parameters, values):
+    '''Fit polynomial and exponential growth curves to measured values.
+
+    Args:
+        parameters (list of int): Values of the parameter of the family.
+        values (list of float): Measured values for the parameters.
+
+    Returns:
+        dict: The better fitting `model` (`polynomial` for a * n^b or
+            `exponential` for a * c^n), its coefficients and the coefficients
+            of determination of both models, or `None` if there are less than
+            three positive values.
+    '''
+    points = [(n, v) for n, v in zip(parameters, values) if n > 0 and v > 0]
+    if len(points) < 3:
+        return None
+
+    ns = [n for n, _ in points]
+    logs = [math.log(v) for _, v in points]
+
+    b, log_a, r2_polynomial = _linear_fit([math.log(n) for n in ns], logs)
+    log_c, log_a_exp, r2_exponential = _linear_fit(ns, logs)
+
+    if r2_exponential > r2_polynomial:
+        fit = {'model': 'exponential', 'a': math.exp(log_a_exp), 'c': math.exp(log_c)}
+    else:
+        fit = {'model': 'polynomial', 'a': math.exp(log_a), 'b': b}
+
+    fit.update({'r2_polynomial': r2_polynomial, 'r2_exponential': r2_exponential})
+
+    return fit
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Measure the growth of PBS on a parametric family of automata',
+           allow_abbrev=True)
+    parser.add_argument('family', type=str, choices=list(FAMILIES),
+                        help='family of automata')
+    parser.add_argument('--start', type=int, default=1,
+                        help='first value of the parameter (1)')
+    parser.add_argument('--step', type=int, default=1,
+                        help='increase of the parameter (1)')
+    parser.add_argument('--max', type=int, default=20,
+                        help='maximal value of the parameter (20)')
+    parser.add_argument('-t', '--timeout', type=float, default=60.0,
+                        help='time ceiling of a single run in seconds (60)')
+    parser.add_argument('-m', '--memory', type=int, default=4096,
+                        help='ceiling of the address space of a single run in '
+                        'MiB (4096)')
+    parser.add_argument('-nscc', '--no_use_scc', action='store_true',
+                        help='do not use the SCC optimization')
+    parser.add_argument('-nhope', '--no_use_hopeful', action='store_true',
+                        help='do not use the hopeful states optimization')
+    parser.add_argument('-nrbts', '--no_restrict_B_to_S', action='store_true',
+                        help='do not restrict states leaving B for S')
+    parser.add_argument('-sub', '--use_subsumption', action='store_true',
+                        help='prune subsumed metastates of S')
+    parser.add_argument('-o', '--output', type=str,
+                        help='file for the results in JSON lines (stdout)')
+
+    args = parser.parse_args()
+
+    if args.step < 1:
+        parser.error('the step must be positive')
+
+    pbs_args = {
+        'optimizations': {
+            'use_scc': not args.no_use_scc,
+            'use_hopeful': not args.no_use_hopeful,
+            'restrict_B_to_S': not args.no_restrict_B_to_S,
+            'use_subsumption': args.use_subsumption
+        }
+    }
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    measured = []
+
+    for n in range(args.start, args.max + 1, args.step):
+        aut = FAMILIES[args.family](n)
+        result = run_pbs_isolated(aut, pbs_args, args.timeout, args.memory * 1024 * 1024)
+
+        record = {'family': args.family, 'parameter': n,
+                  'input_states': aut.num_states(), 'input_edges': aut.num_edges(),
+                  'optimizations': pbs_args['optimizations']}
+        record.update(result)
+        print(json.dumps(record), file=output, flush=True)
+
+        if 'error' in result:
+            print(f'{args.family} {n}: {result["error"]}, stopping', file=sys.stderr)
+            break
+
+        measured.append(record)
+
+    parameters = [record['parameter'] for record in measured]
+    fits = {metric: fit_growth(parameters, [record[metric] for record in measured])
+            for metric in METRICS}
+    print(json.dumps({'family': args.family, 'fits': fits}), file=output)
+
+    if args.output:
+        output.close()
+
+    for metric, fit in fits.items():
+        if fit is None:
+            print(f'{metric}: not enough data', file=sys.stderr)
+        elif fit['model'] == 'polynomial':
+            print(f'{metric}: {fit["a"]:.3g} * n^{fit["b"]:.3g} '
+                  f'(R^2 {fit["r2_polynomial"]:.3f})', file=sys.stderr)
+        else:
+            print(f'{metric}: {fit["a"]:.3g} * {fit["c"]:.3g}^n '
+                  f'(R^2 {fit["r2_exponential"]:.3f})', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
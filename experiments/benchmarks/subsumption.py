@@ -0,0 +1,92 @@
+"""Benchmark of the subsumption pruning of PBS macrostates.
+
+Complements random automata generated as in `formula2aut.py` by PBS with and
+without the `use_subsumption` optimization and reports how many output states
+the pruning saves.
+
+Run for example as
+
+    python benchmarks/subsumption.py -n 100 -ap 2 -q 4 8 --check
+
+from the `experiments` directory.
+"""
+
+import argparse
+import json
+
+import spot
+
+from common import random_automata, run_pbs
+from algo.pbs import PBS
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Measure the state-space reduction of subsumption pruning in PBS',
+           allow_abbrev=True)
+    parser.add_argument('-n', '--count', type=int,
+                        help='number of random automata (100)', default=100)
+    parser.add_argument('-ap', '--ap_count', type=int,
+                        help='number of atomic propositions (2)', default=2)
+    parser.add_argument('-q', '--states', type=int, nargs=2,
+                        help='number of states between the two values (2 7)',
+                        default=[2, 7])
+    parser.add_argument('-s', '--seed', type=int,
+                        help='seed for randaut (0)', default=0)
+    parser.add_argument('--check', action='store_true',
+                        help='check that both complements are equivalent')
+    parser.add_argument('-o', '--output', type=str,
+                        help='file for the per-automaton results in JSON lines')
+
+    args = parser.parse_args()
+
+    automata = random_automata(args.count, args.ap_count, args.states[0],
+                               args.states[1], seed=args.seed)
+
+    output = open(args.output, 'w') if args.output else None
+    totals = {'plain': {'states': 0, 'time': 0.0},
+              'subsumption': {'states': 0, 'time': 0.0}}
+    reduced = 0
+
+    for i, aut in enumerate(automata):
+        record = {'automaton': i, 'input_states': aut.num_states()}
+
+        for mode, use_subsumption in (('plain', False), ('subsumption', True)):
+            result = run_pbs(aut, {'optimizations': {'use_subsumption': use_subsumption}})
+            record[mode] = result
+
+            totals[mode]['states'] += result['states']
+            totals[mode]['time'] += result['time']
+
+        if record['subsumption']['states'] < record['plain']['states']:
+            reduced += 1
+
+        if args.check:
+            plain = PBS(aut, {'optimizations': {'use_subsumption': False}}).complement()
+            pruned = PBS(aut, {'optimizations': {'use_subsumption': True}}).complement()
+            # Each complement is built on its own BDD dictionary, the products
+            # of Spot need automata sharing one.
+            plain = spot.automaton(plain.to_str('hoa'))
+            pruned = spot.automaton(pruned.to_str('hoa'))
+            record['equivalent'] = spot.are_equivalent(plain, pruned)
+            if not record['equivalent']:
+                print(f'automaton {i}: complements are not equivalent')
+
+        if output:
+            print(json.dumps(record), file=output)
+
+    if output:
+        output.close()
+
+    plain = totals['plain']['states']
+    pruned = totals['subsumption']['states']
+
+    print(f'{len(automata)} automata, {reduced} of them reduced')
+    print(f'states without pruning: {plain} ({totals["plain"]["time"]:.3f} s)')
+    print(f'states with pruning:    {pruned} ({totals["subsumption"]["time"]:.3f} s)')
+    if plain:
+        print(f'reduction: {100 * (plain - pruned) / plain:.1f} %')
+
+
+if __name__ == "__main__":
+    main()
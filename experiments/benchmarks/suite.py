@@ -0,0 +1,112 @@
+"""Benchmark suite of PBS over seeded random automata.
+
+Generates random Buchi automata with the parameters of
+`AutomataGenerator.generate` and complements each of them by PBS with every
+combination of the `use_scc`, `use_hopeful` and `restrict_B_to_S`
+optimizations. Every run is done in a fresh process and the wall time, the
+peak resident set size and the number of output states and edges are
+written as JSON lines, one per automaton and combination, so that runs of
+the suite can be compared.
+
+Run for example as
+
+    python benchmarks/suite.py -n 50 -ap 2 -q 4 8 -o suite.jsonl
+
+from the `experiments` directory.
+"""
+
+import argparse
+import itertools
+import json
+import sys
+
+from common import random_automata, run_pbs_isolated
+
+OPTIMIZATIONS = ['use_scc', 'use_hopeful', 'restrict_B_to_S']
+
+
+def combinations():
+    '''Get all combinations of the benchmarked optimizations.
+
+    Returns:
+        list of dict: Optimizations for `PBS`, all enabled first.
+    '''
+    return [dict(zip(OPTIMIZATIONS, values))
+            for values in itertools.product([True, False], repeat=len(OPTIMIZATIONS))]
+
+
+def main():
+    parser = argparse.ArgumentParser \
+      (description='Benchmark PBS with all combinations of its optimizations',
+           allow_abbrev=True)
+    parser.add_argument('-n', '--count', type=int,
+                        help='number of random automata (20)', default=20)
+    parser.add_argument('-ap', '--ap_count', type=int,
+                        help='number of atomic propositions (2)', default=2)
+    parser.add_argument('-q', '--states', type=int, nargs=2,
+                        help='number of states between the two values (2 7)',
+                        default=[2, 7])
+    parser.add_argument('-d', '--deterministic', action='store_true',
+                        help='generate deterministic automata')
+    parser.add_argument('-s', '--seed', type=int,
+                        help='seed for randaut (0)', default=0)
+    parser.add_argument('-t', '--timeout', type=float,
+                        help='time limit of a single run in seconds (none)')
+    parser.add_argument('--bitsets', action='store_true',
+                        help='encode sets of states in macrostates as bitmasks')
+    parser.add_argument('-o', '--output', type=str,
+                        help='file for the results in JSON lines (stdout)')
+
+    args = parser.parse_args()
+
+    automata = random_automata(args.count, args.ap_count, args.states[0],
+                               args.states[1], deterministic=args.deterministic,
+                               seed=args.seed)
+
+    parameters = {
+        'count': args.count,
+        'ap_count': args.ap_count,
+        'min_states': args.states[0],
+        'max_states': args.states[1],
+        'deterministic': args.deterministic,
+        'seed': args.seed,
+        'encoding': 'bitsets' if args.bitsets else 'sets'
+    }
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    totals = dict()
+
+    for i, aut in enumerate(automata):
+        for optimizations in combinations():
+            pbs_args = {'optimizations': optimizations,
+                        'encoding': parameters['encoding']}
+            result = run_pbs_isolated(aut, pbs_args, args.timeout)
+
+            record = {
+                'parameters': parameters,
+                'automaton': i,
+                'input_states': aut.num_states(),
+                'input_edges': aut.num_edges(),
+                'optimizations': optimizations
+            }
+            record.update(result)
+            print(json.dumps(record), file=output, flush=True)
+
+            name = ','.join(o for o in OPTIMIZATIONS if optimizations[o]) or 'none'
+            total = totals.setdefault(name, {'time': 0.0, 'states': 0, 'failed': 0})
+            if 'error' in result:
+                total['failed'] += 1
+            else:
+                total['time'] += result['time']
+                total['states'] += result['states']
+
+    if args.output:
+        output.close()
+
+    for name, total in totals.items():
+        print(f'{name}: {total["states"]} states in {total["time"]:.3f} s, '
+              f'{total["failed"]} failed', file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,7 @@ class AutomataGenerator:
         self.output_dir = output_dir
 
     def _create_args(self, location, ap_count, min_states, max_states,
-                     generalized, deterministic):
+                     generalized, deterministic, seed=None):
         '''Format arguments for calling randaut.
 
         Note that we request infinite number of automata from randaut. This is
@@ -37,8 +37,40 @@ class AutomataGenerator:
         if deterministic:
             args.append('-D')
 
+        if seed is not None:
+            args.append(f'--seed={seed}')
+
         return args
 
+    def automata(self, count, ap_count=2, min_states=2, max_states=7, generalized=1,
+                 deterministic=False, seed=None, buchi=False):
+        '''Generate random automata in-process.
+
+        Runs the same randaut | autfilt pipeline as `generate`, but yields the
+        automata parsed by Spot instead of saving them to `output_dir`.
+
+        Args:
+            Check `generate`.
+            seed (int, optional): Seed for randaut (defaults to randaut's own).
+            buchi (bool, optional): Convert the automata to Buchi automata (
+                defaults to False).
+
+        Yields:
+            spot.twa_graph: The generated automata.
+        '''
+        import spot
+
+        randaut_args = self._create_args(None, ap_count, min_states, max_states,
+                                         generalized, deterministic, seed)
+        autfilt_args = ['--small', '--is-empty', '-v', '-u', f'-n {count}']
+
+        if buchi:
+            autfilt_args.append('-B')
+
+        cmd = ['randaut'] + randaut_args + ['|'] + ['autfilt'] + autfilt_args + ['|']
+
+        yield from spot.automata(' '.join(cmd))
+
     def generate(self, count, formula_prefix='aut', formula_file=None, ap_count=2, min_states=2,
                  max_states=7, generalized=1, deterministic=False, complements=False):
         '''Generate random automata.
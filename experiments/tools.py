@@ -12,12 +12,16 @@ def get_automata_generators():
 
     return tools
 
-def get_tools(full=True, automata=False, use_buechic=False, use_fribourg=False):
+def get_tools(full=True, automata=False, use_buechic=False, use_fribourg=False,
+              pbs_server=None):
     """Prepare the tool chains
 
     Args:
         full     (bool, optional): All toolchains or only check ones.
         automata (bool, optional): Get tools that process automata, not ltl
+        pbs_server (str, optional): Unix socket of a running PBS server
+                                    (`complement.py --server`) to use instead
+                                    of starting PBS for each automaton.
 
     Returns:
         dict: Dictionary of tool configurations for ltlcross.
@@ -26,7 +30,10 @@ def get_tools(full=True, automata=False, use_buechic=False, use_fribourg=False):
     # Paths to tools.
     sem_bin     = './tools/seminator/seminator'
     ncsb_script = 'python tools/ncsb.py'
-    pbs_script  = 'python ../complement/complement.py'
+    # PBS itself is measured, not the cheaper constructions it dispatches to.
+    pbs_script  = 'python ../complement/complement.py --force_pbs'
+    if pbs_server:
+        pbs_script = 'python ../complement/client.py ' + pbs_server
     buechic_jar = 'java -jar tools/buechic/buechic.jar'
     goal_bin    = './tools/goal/gc batch'
 